@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import APIRouter, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -7,6 +9,8 @@ from app.routes.music import router as music_router
 from app.routes.webdav import router as webdav_router
 from app.routes.cookies import router as cookies_router
 from app.routes.youtube import router as youtube_router
+from app.services import google, passwords, redisclient
+from app.services.pubsub import hub
 from app.settings import ENV, settings
 
 api_router = APIRouter(prefix="/api")
@@ -18,7 +22,22 @@ api_router.include_router(webdav_router)
 api_router.include_router(cookies_router)
 
 
-app = FastAPI(title="dripdrop", docs_url="/api/docs", openapi_url="/api/openapi.json")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    redisclient.get_pool()
+    yield
+    await hub.close()
+    await google.close_client()
+    await redisclient.close_pool()
+    passwords.shutdown_executor()
+
+
+app = FastAPI(
+    title="dripdrop",
+    docs_url="/api/docs",
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan,
+)
 app.include_router(api_router)
 
 
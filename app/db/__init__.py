@@ -1,16 +1,81 @@
+import time
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
-from sqlalchemy import TIMESTAMP
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import TIMESTAMP, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 from app.settings import settings
 
-engine = create_async_engine(settings.async_database_url)
+engine = create_async_engine(
+    settings.async_database_url,
+    pool_size=settings.database_pool_size,
+    max_overflow=settings.database_max_overflow,
+    pool_timeout=settings.database_pool_timeout,
+    pool_recycle=settings.database_pool_recycle,
+)
 session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 
+@dataclass
+class PoolMetrics:
+    connects: int = 0
+    checkouts: int = 0
+    checkins: int = 0
+    waits: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    def record_wait(self, wait_time: float):
+        self.waits += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def snapshot(self):
+        pool = engine.sync_engine.pool
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "average_wait_time": self.total_wait_time / self.waits
+            if self.waits
+            else 0.0,
+            "max_wait_time": self.max_wait_time,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.connects += 1
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.checkouts += 1
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.checkins += 1
+
+
+async def checkout_connection(session: AsyncSession):
+    start = time.perf_counter()
+    await session.connection()
+    wait_time = time.perf_counter() - start
+    pool_metrics.record_wait(wait_time)
+    return wait_time
+
+
 @asynccontextmanager
 async def get_session():
     async with session_maker() as session:
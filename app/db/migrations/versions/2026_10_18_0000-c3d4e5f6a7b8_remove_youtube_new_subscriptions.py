@@ -0,0 +1,40 @@
+"""remove youtube new subscriptions
+
+Revision ID: c3d4e5f6a7b8
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3d4e5f6a7b8"
+down_revision = "b2c3d4e5f6a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_table("youtube_new_subscriptions")
+
+
+def downgrade():
+    op.create_table(
+        "youtube_new_subscriptions",
+        sa.Column("channel_id", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("modified_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["email"],
+            ["users.email"],
+            name="youtube_new_subscriptions_email_fkey",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint(
+            "channel_id", "email", name="youtube_new_subscriptions_pk"
+        ),
+    )
@@ -0,0 +1,78 @@
+"""add youtube feed videos
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-18 01:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d4e5f6a7b8c9"
+down_revision = "c3d4e5f6a7b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "youtube_feed_videos",
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("video_id", sa.String(), nullable=False),
+        sa.Column("channel_id", sa.String(), nullable=False),
+        sa.Column("published_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("modified_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["email"],
+            ["users.email"],
+            name="youtube_feed_videos_email_fkey",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["video_id"],
+            ["youtube_videos.id"],
+            name="youtube_feed_videos_video_id_fkey",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["channel_id"],
+            ["youtube_channels.id"],
+            name="youtube_feed_videos_channel_id_fkey",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("email", "video_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO youtube_feed_videos
+            (email, video_id, channel_id, published_at, created_at)
+        SELECT
+            youtube_subscriptions.email,
+            youtube_videos.id,
+            youtube_videos.channel_id,
+            youtube_videos.published_at,
+            now()
+        FROM youtube_videos
+        JOIN youtube_subscriptions
+            ON youtube_subscriptions.channel_id = youtube_videos.channel_id
+        WHERE youtube_subscriptions.deleted_at IS NULL
+        """
+    )
+    op.create_index(
+        "youtube_feed_videos_email_published_at_idx",
+        "youtube_feed_videos",
+        ["email", "published_at", "video_id"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "youtube_feed_videos_email_published_at_idx", table_name="youtube_feed_videos"
+    )
+    op.drop_table("youtube_feed_videos")
@@ -0,0 +1,73 @@
+"""add hot path indexes
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 02:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5f6a7b8c9d0"
+down_revision = "d4e5f6a7b8c9"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (
+        "youtube_videos_channel_id_published_at_idx",
+        "youtube_videos",
+        ["channel_id", sa.text("published_at DESC"), sa.text("id DESC")],
+    ),
+    (
+        "youtube_videos_category_id_published_at_idx",
+        "youtube_videos",
+        ["category_id", sa.text("published_at DESC")],
+    ),
+    (
+        "youtube_subscriptions_email_deleted_at_idx",
+        "youtube_subscriptions",
+        ["email", "deleted_at"],
+    ),
+    (
+        "music_jobs_user_email_deleted_at_created_at_idx",
+        "music_jobs",
+        ["user_email", "deleted_at", sa.text("created_at DESC"), sa.text("id DESC")],
+    ),
+    (
+        "youtube_video_likes_email_created_at_idx",
+        "youtube_video_likes",
+        ["email", "created_at"],
+    ),
+    (
+        "youtube_video_queues_email_created_at_idx",
+        "youtube_video_queues",
+        ["email", "created_at"],
+    ),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table_name, columns in INDEXES:
+            op.create_index(
+                name,
+                table_name,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table_name, _ in INDEXES:
+            op.drop_index(
+                name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,34 @@
+"""add videos backfilled to youtube channels
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-18 03:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f6a7b8c9d0e1"
+down_revision = "e5f6a7b8c9d0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing channels may have gaps, so each is walked once more in full
+    op.add_column(
+        "youtube_channels",
+        sa.Column(
+            "videos_backfilled",
+            sa.Boolean(),
+            nullable=False,
+            server_default=sa.false(),
+        ),
+    )
+    op.alter_column("youtube_channels", "videos_backfilled", server_default=None)
+
+
+def downgrade():
+    op.drop_column("youtube_channels", "videos_backfilled")
@@ -1,11 +1,73 @@
+import time
+from collections import OrderedDict
+
 from cryptography.fernet import Fernet
-from sqlalchemy import event
 
 from app.settings import settings
 
 fernet = Fernet(bytes(settings.fernet_key, encoding="utf-8"))
 
 
+class DecryptedCredentialsCache:
+    def __init__(self):
+        self._values: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+
+    def get(self, email: str, ciphertext: str):
+        key = (email, ciphertext)
+        if entry := self._values.get(key):
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._values.move_to_end(key)
+                return value
+            del self._values[key]
+        return None
+
+    def set(self, email: str, ciphertext: str, value: str):
+        key = (email, ciphertext)
+        self._values[key] = (time.monotonic() + settings.credentials_cache_ttl, value)
+        self._values.move_to_end(key)
+        while len(self._values) > settings.credentials_cache_size:
+            self._values.popitem(last=False)
+
+    def invalidate(self, email: str):
+        for key in [key for key in self._values if key[0] == email]:
+            del self._values[key]
+
+    def clear(self):
+        self._values.clear()
+
+
+credentials_cache = DecryptedCredentialsCache()
+
+
+class EncryptedField:
+    # Reads decrypt on access and writes encrypt on assignment, so rows that
+    # never touch their credentials never pay for Fernet
+    def __init__(self, column: str):
+        self.column = column
+
+    def __get__(self, target: "EncryptedCredentialsMixin | None", owner: type):
+        if target is None:
+            return getattr(owner, self.column)
+        if (ciphertext := getattr(target, self.column)) is None:
+            return None
+        email = target.email
+        if (value := credentials_cache.get(email, ciphertext)) is None:
+            value = target.decrypt_value(ciphertext)
+            credentials_cache.set(email, ciphertext, value)
+        return value
+
+    def __set__(self, target: "EncryptedCredentialsMixin", value: str):
+        if (
+            getattr(target, self.column) is not None
+            and self.__get__(target, type(target)) == value
+        ):
+            return
+        ciphertext = target.encrypt_value(value)
+        setattr(target, self.column, ciphertext)
+        credentials_cache.set(target.email, ciphertext, value)
+
+
 class EncryptedCredentialsMixin:
     @classmethod
     def encrypt_value(cls, value: str) -> str:
@@ -17,13 +79,6 @@ class EncryptedCredentialsMixin:
 
     @classmethod
     def register_encrypted_fields(cls, *fields: str) -> None:
-        @event.listens_for(cls, "before_insert")
-        @event.listens_for(cls, "before_update")
-        def encrypt_before_persist(mapper, connection, target):
-            for field in fields:
-                setattr(target, field, cls.encrypt_value(getattr(target, field)))
-
-        @event.listens_for(cls, "load")
-        def decrypt_on_load(target, context):
-            for field in fields:
-                setattr(target, field, cls.decrypt_value(getattr(target, field)))
+        # Each field is stored in an "encrypted_<field>" column attribute
+        for field in fields:
+            setattr(cls, field, EncryptedField(column=f"encrypted_{field}"))
@@ -5,7 +5,7 @@ import uuid
 from dataclasses import dataclass
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, ForeignKey, select
+from sqlalchemy import TIMESTAMP, ForeignKey, Index, select, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base, get_session
@@ -23,6 +23,15 @@ class MusicFile:
 
 class MusicJob(Base):
     __tablename__ = "music_jobs"
+    __table_args__ = (
+        Index(
+            "music_jobs_user_email_deleted_at_created_at_idx",
+            "user_email",
+            "deleted_at",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True, default=lambda: str(uuid.uuid4()))
     user_email: Mapped[str] = mapped_column(
@@ -1,11 +1,11 @@
 from typing import TYPE_CHECKING
 
-import bcrypt
-from sqlalchemy import ForeignKey, event
+from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
 from app.db.models.encrypted import EncryptedCredentialsMixin
+from app.services import passwords
 
 if TYPE_CHECKING:
     from app.db.models.music import MusicJob
@@ -48,27 +48,11 @@ class User(Base):
         "Cookies", back_populates="user", uselist=False
     )
 
-    def set_password(self, new_password: str):
-        self.password = self.hash_password(new_password)
+    async def set_password(self, new_password: str):
+        self.password = await passwords.hash_password(new_password)
 
-    def check_password(self, password: str):
-        return bcrypt.checkpw(
-            bytes(password, encoding="utf-8"),
-            bytes(self.password, encoding="utf-8"),
-        )
-
-    @classmethod
-    def hash_password(cls, password: str):
-        return str(
-            bcrypt.hashpw(bytes(password, encoding="utf-8"), bcrypt.gensalt()),
-            encoding="utf-8",
-        )
-
-
-@event.listens_for(User, "init")
-def init_user(target: User, args, kwargs):
-    if "password" in kwargs:
-        kwargs["password"] = target.hash_password(kwargs["password"])
+    async def check_password(self, password: str):
+        return await passwords.check_password(password, self.password)
 
 
 class WebDav(EncryptedCredentialsMixin, Base):
@@ -83,8 +67,8 @@ class WebDav(EncryptedCredentialsMixin, Base):
         ),
         primary_key=True,
     )
-    username: Mapped[str] = mapped_column(nullable=False)
-    password: Mapped[str] = mapped_column(nullable=False)
+    encrypted_username: Mapped[str] = mapped_column("username", nullable=False)
+    encrypted_password: Mapped[str] = mapped_column("password", nullable=False)
     url: Mapped[str] = mapped_column(nullable=False)
     user: Mapped[User] = relationship(User, back_populates="webdav")
 
@@ -104,7 +88,7 @@ class Cookies(EncryptedCredentialsMixin, Base):
         ),
         primary_key=True,
     )
-    content: Mapped[str] = mapped_column(nullable=False)
+    encrypted_content: Mapped[str] = mapped_column("content", nullable=False)
     user: Mapped[User] = relationship(User, back_populates="cookies")
 
 
@@ -1,6 +1,8 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import TIMESTAMP, ForeignKey
+from sqlalchemy import TIMESTAMP, ForeignKey, Index, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -35,6 +37,8 @@ class YoutubeChannel(Base):
         TIMESTAMP(timezone=True), nullable=False
     )
     updating: Mapped[bool] = mapped_column(nullable=False, default=False)
+    # Set once a crawl has walked the whole uploads playlist
+    videos_backfilled: Mapped[bool] = mapped_column(nullable=False, default=False)
     subscriptions: Mapped[list["YoutubeSubscription"]] = relationship(
         "YoutubeSubscription", back_populates="channel"
     )
@@ -45,6 +49,9 @@ class YoutubeChannel(Base):
 
 class YoutubeSubscription(Base):
     __tablename__ = "youtube_subscriptions"
+    __table_args__ = (
+        Index("youtube_subscriptions_email_deleted_at_idx", "email", "deleted_at"),
+    )
 
     channel_id: Mapped[str] = mapped_column(
         ForeignKey(
@@ -76,22 +83,6 @@ class YoutubeSubscription(Base):
     )
 
 
-class YoutubeNewSubscription(Base):
-    __tablename__ = "youtube_new_subscriptions"
-
-    channel_id: Mapped[str] = mapped_column(primary_key=True)
-    email: Mapped[str] = mapped_column(
-        ForeignKey(
-            User.email,
-            onupdate="CASCADE",
-            ondelete="CASCADE",
-            name="youtube_new_subscriptions_email_fkey",
-        ),
-        nullable=False,
-        primary_key=True,
-    )
-
-
 class YoutubeVideoCategory(Base):
     __tablename__ = "youtube_video_categories"
 
@@ -104,6 +95,19 @@ class YoutubeVideoCategory(Base):
 
 class YoutubeVideo(Base):
     __tablename__ = "youtube_videos"
+    __table_args__ = (
+        Index(
+            "youtube_videos_channel_id_published_at_idx",
+            "channel_id",
+            text("published_at DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "youtube_videos_category_id_published_at_idx",
+            "category_id",
+            text("published_at DESC"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(nullable=False)
@@ -149,6 +153,9 @@ class YoutubeVideo(Base):
 
 class YoutubeVideoLike(Base):
     __tablename__ = "youtube_video_likes"
+    __table_args__ = (
+        Index("youtube_video_likes_email_created_at_idx", "email", "created_at"),
+    )
 
     email: Mapped[str] = mapped_column(
         ForeignKey(
@@ -176,6 +183,9 @@ class YoutubeVideoLike(Base):
 
 class YoutubeVideoQueue(Base):
     __tablename__ = "youtube_video_queues"
+    __table_args__ = (
+        Index("youtube_video_queues_email_created_at_idx", "email", "created_at"),
+    )
 
     email: Mapped[str] = mapped_column(
         ForeignKey(
@@ -226,3 +236,99 @@ class YoutubeVideoWatch(Base):
     )
     user: Mapped[User] = relationship(User, back_populates="youtube_video_watches")
     video: Mapped[YoutubeVideo] = relationship(YoutubeVideo, back_populates="watches")
+
+
+class YoutubeFeedVideo(Base):
+    __tablename__ = "youtube_feed_videos"
+    __table_args__ = (
+        Index(
+            "youtube_feed_videos_email_published_at_idx",
+            "email",
+            "published_at",
+            "video_id",
+        ),
+    )
+
+    email: Mapped[str] = mapped_column(
+        ForeignKey(
+            User.email,
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+            name="youtube_feed_videos_email_fkey",
+        ),
+        primary_key=True,
+        nullable=False,
+    )
+    video_id: Mapped[str] = mapped_column(
+        ForeignKey(
+            YoutubeVideo.id,
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+            name="youtube_feed_videos_video_id_fkey",
+        ),
+        primary_key=True,
+        nullable=False,
+    )
+    channel_id: Mapped[str] = mapped_column(
+        ForeignKey(
+            YoutubeChannel.id,
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+            name="youtube_feed_videos_channel_id_fkey",
+        ),
+        nullable=False,
+    )
+    published_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False
+    )
+
+    @classmethod
+    async def _add(cls, db_session: AsyncSession, *criteria):
+        query = (
+            select(
+                YoutubeSubscription.email,
+                YoutubeVideo.id,
+                YoutubeVideo.channel_id,
+                YoutubeVideo.published_at,
+                func.now(),
+            )
+            .join(
+                YoutubeSubscription,
+                YoutubeSubscription.channel_id == YoutubeVideo.channel_id,
+            )
+            .where(YoutubeSubscription.deleted_at.is_(None), *criteria)
+        )
+        statement = insert(cls).from_select(
+            ["email", "video_id", "channel_id", "published_at", "created_at"], query
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[cls.email, cls.video_id],
+            set_={
+                "published_at": statement.excluded.published_at,
+                "modified_at": datetime.now(timezone.utc),
+            },
+            where=cls.published_at != statement.excluded.published_at,
+        )
+        await db_session.execute(statement)
+
+    @classmethod
+    async def add_videos(cls, db_session: AsyncSession, video_ids: list[str]):
+        await cls._add(db_session, YoutubeVideo.id.in_(video_ids))
+
+    @classmethod
+    async def add_subscriptions(
+        cls, db_session: AsyncSession, email: str, channel_ids: list[str]
+    ):
+        await cls._add(
+            db_session,
+            YoutubeSubscription.email == email,
+            YoutubeVideo.channel_id.in_(channel_ids),
+        )
+
+    @classmethod
+    async def remove_subscriptions(
+        cls, db_session: AsyncSession, email: str, channel_ids: list[str]
+    ):
+        await db_session.execute(
+            delete(cls).where(cls.email == email, cls.channel_id.in_(channel_ids))
+        )
@@ -1,12 +1,15 @@
+import time
+from collections import OrderedDict
 from typing import Annotated
 
 from fastapi import Cookie, Depends, Header, HTTPException, WebSocket, status
 from redis.asyncio import Redis
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.db import User, session_maker
-from app.services import cookie_session, jwt
+from app.services import cookie_session, jwt, redisclient
 from app.settings import settings
 
 
@@ -19,17 +22,54 @@ DatabaseSession = Annotated[AsyncSession, Depends(provide_session)]
 
 
 async def provide_redis():
-    redis = Redis.from_url(settings.redis_url)
-    try:
+    async with redisclient.get_redis() as redis:
         yield redis
-    except Exception as e:
-        await redis.aclose()
-        raise e
 
 
 RedisClient = Annotated[Redis, Depends(provide_redis)]
 
 
+class UserCache:
+    def __init__(self):
+        self._users: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, key: str):
+        if entry := self._users.get(key):
+            expires_at, values = entry
+            if expires_at > time.monotonic():
+                self._users.move_to_end(key)
+                # Every request gets its own detached copy of the user
+                user = User(**values)
+                make_transient_to_detached(user)
+                return user
+            del self._users[key]
+        return None
+
+    def set(self, key: str, user: User):
+        self._users[key] = (
+            time.monotonic() + settings.auth_user_cache_ttl,
+            {
+                attribute.key: getattr(user, attribute.key)
+                for attribute in inspect(User).column_attrs
+                if attribute.key != "password"
+            },
+        )
+        self._users.move_to_end(key)
+        while len(self._users) > settings.auth_user_cache_size:
+            self._users.popitem(last=False)
+
+    def invalidate(self, email: str):
+        for key, (_, values) in list(self._users.items()):
+            if values["email"] == email:
+                del self._users[key]
+
+    def clear(self):
+        self._users.clear()
+
+
+user_cache = UserCache()
+
+
 async def get_user_from_jwt(token: str | None, db_session: AsyncSession):
     if token:
         if (payload := await jwt.decode(token)) and (email := payload.sub):
@@ -39,39 +79,41 @@ async def get_user_from_jwt(token: str | None, db_session: AsyncSession):
     return None
 
 
-async def get_user_from_header(
-    db_session: DatabaseSession, authorization: Annotated[str | None, Header()] = None
-):
-    if authorization:
-        token_parts = authorization.trim().split(" ")
-        if len(token_parts) == 2:
-            token_type, token = token_parts
-            if token_type.strip() == "Bearer":
-                return await get_user_from_jwt(token=token, db_session=db_session)
+async def get_user_from_header(db_session: AsyncSession, authorization: str):
+    token_parts = authorization.strip().split(" ")
+    if len(token_parts) == 2:
+        token_type, token = token_parts
+        if token_type.strip() == "Bearer":
+            return await get_user_from_jwt(token=token, db_session=db_session)
     return None
 
 
-HeaderUser = Annotated[User | None, Depends(get_user_from_header)]
-
-
-async def get_user_from_cookie(
-    db_session: DatabaseSession, token: Annotated[str | None, Cookie()] = None
-):
-    if token:
-        jwt_token = await cookie_session.get(token=token)
-        return await get_user_from_jwt(token=jwt_token, db_session=db_session)
+async def get_user_from_cookie(token: str):
+    # Sessions are only created for verified users, so the user is not loaded
+    if session := await cookie_session.get(token=token):
+        return User(email=session.email, admin=session.admin, verified=True)
     return None
 
 
-CookieUser = Annotated[User | None, Depends(get_user_from_cookie)]
-
-
 async def get_authenticated_user(
-    header_user: HeaderUser,
-    cookie_user: CookieUser,
+    db_session: DatabaseSession,
+    authorization: Annotated[str | None, Header()] = None,
+    token: Annotated[str | None, Cookie()] = None,
     websocket: WebSocket = None,
 ):
-    if user := header_user or cookie_user:
+    # The cookie is only looked at when there is no authorization header
+    key = f"header:{authorization}" if authorization else f"cookie:{token}"
+    if (authorization or token) and (user := user_cache.get(key)):
+        return user
+    user = None
+    if authorization:
+        user = await get_user_from_header(
+            db_session=db_session, authorization=authorization
+        )
+    elif token:
+        user = await get_user_from_cookie(token=token)
+    if user:
+        user_cache.set(key, user)
         return user
     if websocket:
         await websocket.close()
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, ConfigDict, Field, alias_generators
+from fastapi import Response as HTTPResponse
+from pydantic import BaseModel, ConfigDict, Field, alias_generators, model_validator
 
 
 class Response(BaseModel):
@@ -8,7 +9,29 @@ class Response(BaseModel):
         from_attributes=True,
     )
 
+    def json_response(self):
+        # Skips the validation and encoding passes FastAPI runs on return values
+        return HTTPResponse(
+            content=self.model_dump_json(by_alias=True), media_type="application/json"
+        )
+
 
 class Pagination(BaseModel):
     page: int = Field(..., ge=1)
     per_page: int = Field(..., le=50, gt=0)
+    estimate_total: bool = False
+
+
+class CursorPagination(BaseModel):
+    page: int = Field(1, ge=1)
+    per_page: int = Field(..., le=50, gt=0)
+    cursor: str | None = None
+    include_total: bool | None = None
+    estimate_total: bool = False
+
+    @model_validator(mode="after")
+    def default_include_total(self):
+        # Counting is only needed by default for page numbered requests
+        if self.include_total is None:
+            self.include_total = self.cursor is None
+        return self
@@ -0,0 +1,7 @@
+from app.models import Response
+
+
+class RedisPoolResponse(Response):
+    max_connections: int
+    in_use_connections: int
+    available_connections: int
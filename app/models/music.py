@@ -73,4 +73,5 @@ class MusicJobResponse(Response):
 
 class MusicJobListResponse(Response):
     jobs: list[MusicJobResponse]
-    total_pages: int
+    total_pages: int | None = None
+    next_cursor: str | None = None
@@ -3,7 +3,7 @@ from typing import Optional
 
 from pydantic import ConfigDict, Field, field_validator
 
-from app.models import Pagination, Response
+from app.models import CursorPagination, Response
 
 
 class YoutubeChannelUpdateResponse(Response):
@@ -21,6 +21,12 @@ class YoutubeChannelResponse(Response):
     updating: bool
 
 
+class YoutubeChannelVideosMetricsResponse(Response):
+    enqueued: int
+    coalesced: int
+    absorbed: int
+
+
 class YoutubeSubscriptionsResponse(Response):
     channels: list[YoutubeChannelResponse]
     total_pages: int
@@ -56,7 +62,8 @@ class YoutubeVideoResponse(Response):
 
 class YoutubeVideosResponse(Response):
     videos: list[YoutubeVideoResponse]
-    total_pages: int
+    total_pages: int | None = None
+    next_cursor: str | None = None
 
 
 class YoutubeVideoDetailResponse(YoutubeVideoResponse):
@@ -67,7 +74,7 @@ class YoutubeVideoCategoriesResponse(Response):
     categories: list[YoutubeVideoCategoryResponse]
 
 
-class GetVideos(Pagination):
+class GetVideos(CursorPagination):
     video_categories: Optional[list[int]] = Field([])
     channel_id: Optional[str] = Field(None)
     liked_only: Optional[bool] = Field(False)
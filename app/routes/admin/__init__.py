@@ -4,6 +4,9 @@ from fastapi import APIRouter, BackgroundTasks, Depends, Query, Response, status
 from pydantic import EmailStr
 
 from app.dependencies import get_admin_user
+from app.models.admin import RedisPoolResponse
+from app.models.youtube import YoutubeChannelVideosMetricsResponse
+from app.services import redisclient
 from app.tasks import youtube
 
 router = APIRouter(
@@ -22,6 +25,11 @@ async def run_cron_jobs(background_tasks: BackgroundTasks):
     return Response(None, status_code=status.HTTP_200_OK)
 
 
+@router.get("/redis/pool", response_model=RedisPoolResponse)
+async def get_redis_pool():
+    return RedisPoolResponse(**redisclient.get_pool_stats())
+
+
 @router.get("/youtube/update_subscriptions")
 async def run_update_subscriptions(
     background_tasks: BackgroundTasks, email: Annotated[EmailStr, Query()] = None
@@ -40,20 +48,34 @@ async def run_update_channel_videos(
     date_after: Annotated[
         str, Query(description="date string with format YYYYMMDD")
     ] = None,
+    full_backfill: Annotated[bool, Query()] = False,
 ):
     if not channel_id:
         background_tasks.add_task(
-            youtube.update_channel_videos.delay, date_after=date_after
+            youtube.update_channel_videos.delay,
+            date_after=date_after,
+            full_backfill=full_backfill,
         )
     else:
         background_tasks.add_task(
-            youtube.add_channel_videos.delay,
+            youtube.request_channel_videos,
             channel_id=channel_id,
             date_after=date_after,
+            full_backfill=full_backfill,
         )
     return Response(None, status_code=status.HTTP_200_OK)
 
 
+@router.get(
+    "/youtube/channel_videos/metrics",
+    response_model=YoutubeChannelVideosMetricsResponse,
+)
+async def get_channel_videos_metrics():
+    return YoutubeChannelVideosMetricsResponse(
+        **await youtube.get_channel_videos_metrics()
+    )
+
+
 @router.get("/youtube/update_video_categories")
 async def run_update_video_categories(background_tasks: BackgroundTasks):
     background_tasks.add_task(youtube.update_video_categories.delay)
@@ -4,7 +4,7 @@ from fastapi import (
     APIRouter,
     BackgroundTasks,
     Body,
-    Depends,
+    Cookie,
     HTTPException,
     Query,
     Request,
@@ -19,7 +19,7 @@ from app.dependencies import (
     AuthUser,
     DatabaseSession,
     RedisClient,
-    get_authenticated_user,
+    user_cache,
 )
 from app.models.authentication import (
     AuthenticatedResponse,
@@ -29,7 +29,7 @@ from app.models.authentication import (
     SendResetPassword,
     UserResponse,
 )
-from app.services import cookie_session, jwt
+from app.services import cookie_session, jwt, passwords
 from app.tasks.email import send_password_reset_email, send_verification_email
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -56,9 +56,14 @@ async def login(db_session: DatabaseSession, body: Annotated[LoginUser, Body()])
     query = select(User).where(User.email == body.email)
     if user := await db_session.scalar(query):
         if user.verified:
-            if user.check_password(body.password):
+            if await user.check_password(body.password):
+                if passwords.needs_rehash(user.password):
+                    await user.set_password(body.password)
+                    await db_session.commit()
                 jwt_token = await jwt.create(email=body.email)
-                session_token = await cookie_session.create(jwt_token=jwt_token)
+                session_token = await cookie_session.create(
+                    email=user.email, admin=user.admin
+                )
                 response = JSONResponse(
                     content=AuthenticatedResponse(
                         access_token=jwt_token,
@@ -79,11 +84,13 @@ async def login(db_session: DatabaseSession, body: Annotated[LoginUser, Body()])
 
 @router.delete(
     "/logout",
-    dependencies=[Depends(get_authenticated_user)],
     status_code=status.HTTP_204_NO_CONTENT,
     responses={status.HTTP_401_UNAUTHORIZED: {}},
 )
-async def logout():
+async def logout(user: AuthUser, token: Annotated[str | None, Cookie()] = None):
+    if token:
+        await cookie_session.revoke(token=token)
+    user_cache.invalidate(email=user.email)
     response = Response(None)
     response.delete_cookie("token")
     return response
@@ -107,7 +114,7 @@ async def create_account(
         raise HTTPException(
             detail="Account exists.", status_code=status.HTTP_400_BAD_REQUEST
         )
-    user = User(email=body.email, password=body.password)
+    user = User(email=body.email, password=await passwords.hash_password(body.password))
     db_session.add(user)
     await db_session.commit()
     background_tasks.add_task(
@@ -132,6 +139,7 @@ async def verify_email(
         if user := await db_session.scalar(query):
             user.verified = True
             await db_session.commit()
+            user_cache.invalidate(email=email)
             await redis.delete(f"verify:{token}")
             return None
         raise HTTPException(
@@ -179,8 +187,10 @@ async def reset_password(
         email = email.decode()
         query = select(User).where(User.email == email)
         if user := await db_session.scalar(query):
-            user.set_password(body.password)
+            await user.set_password(body.password)
             await db_session.commit()
+            await cookie_session.revoke_user(email=email)
+            user_cache.invalidate(email=email)
             await redis.delete(f"reset:{body.token}")
             return None
         raise HTTPException(
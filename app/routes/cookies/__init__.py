@@ -4,6 +4,7 @@ from fastapi import APIRouter, Body, Depends, HTTPException, status
 from sqlalchemy import select
 
 from app.db import Cookies
+from app.db.models.encrypted import credentials_cache
 from app.dependencies import AuthUser, DatabaseSession, get_authenticated_user
 from app.models.cookies import CookiesResponse, UpdateCookies
 
@@ -51,4 +52,5 @@ async def delete_cookies(user: AuthUser, session: DatabaseSession):
     if cookies := await session.scalar(query):
         await session.delete(cookies)
         await session.commit()
+        credentials_cache.invalidate(email=user.email)
     return None
@@ -18,15 +18,17 @@ from sqlalchemy import select
 
 from app.db import MusicFile, MusicJob
 from app.dependencies import AuthUser, DatabaseSession, get_authenticated_user
-from app.models import Pagination
+from app.models import CursorPagination
 from app.models.music import (
     CreateMusicJob,
     MusicJobListResponse,
-    MusicJobUpdateResponse,
+    MusicJobResponse,
 )
+from app.services.counts import CountCache, CountScope, invalidate_counts
 from app.services.pubsub import PubSub
 from app.tasks.music import run_music_job
-from app.utils.database import query_with_pagination
+from app.utils.database import Keyset, query_with_pagination
+from app.utils.websocket import listen_updates
 
 router = APIRouter(
     prefix="/jobs",
@@ -68,6 +70,7 @@ async def create_job(
     )
     session.add(music_job)
     await session.commit()
+    await invalidate_counts(email=user.email, scopes=[CountScope.MUSIC_JOBS])
     music_file = (
         MusicFile(
             file=await form.file.read(),
@@ -106,6 +109,7 @@ async def delete_job(
     if music_job := await db_session.scalar(query):
         music_job.deleted_at = datetime.now(timezone.utc)
         await db_session.commit()
+        await invalidate_counts(email=user.email, scopes=[CountScope.MUSIC_JOBS])
         background_tasks.add_task(music_job.cleanup)
         return None
     raise HTTPException(detail="Job not found.", status_code=status.HTTP_404_NOT_FOUND)
@@ -115,45 +119,44 @@ async def delete_job(
 async def get_jobs(
     user: AuthUser,
     db_session: DatabaseSession,
-    query_params: Annotated[Pagination, Query()],
+    query_params: Annotated[CursorPagination, Query()],
 ):
-    query = (
-        select(MusicJob)
-        .where(MusicJob.user_email == user.email, MusicJob.deleted_at.is_(None))
-        .order_by(MusicJob.created_at.desc())
-    )
+    query = select(
+        *[getattr(MusicJob, field) for field in MusicJobResponse.model_fields]
+    ).where(MusicJob.user_email == user.email, MusicJob.deleted_at.is_(None))
     paginated_results = await query_with_pagination(
         db_session=db_session,
         query=query,
         page=query_params.page,
         per_page=query_params.per_page,
+        keyset=Keyset(columns=[MusicJob.created_at, MusicJob.id]),
+        cursor=query_params.cursor,
+        include_total=query_params.include_total,
+        count_cache=CountCache(scope=CountScope.MUSIC_JOBS, email=user.email),
+        estimate_total=query_params.estimate_total,
     )
-    return MusicJobListResponse(
-        jobs=paginated_results.results, total_pages=paginated_results.total_pages
-    )
+    return MusicJobListResponse.model_construct(
+        jobs=[
+            MusicJobResponse.model_construct(**row._mapping)
+            for row in paginated_results.results
+        ],
+        total_pages=paginated_results.total_pages,
+        next_cursor=paginated_results.next_cursor,
+    ).json_response()
 
 
 @router.websocket("/listen")
 async def listen_jobs(
     user: AuthUser, websocket: WebSocket, db_session: DatabaseSession
 ):
+    # Give the connection back to the pool for as long as the socket is open
+    await db_session.close()
     await websocket.accept()
-    subscriber = PubSub(channels=[PubSub.Channels.MUSIC_JOB_UPDATE])
     try:
-        async for message in subscriber.listen(ignore_subscribe_messages=True):
-            if message:
-                parsed_message = MusicJobUpdateResponse.model_validate_json(
-                    message["data"]
-                )
-                job_id = parsed_message.id
-                query = select(MusicJob).where(
-                    MusicJob.user_email == user.email,
-                    MusicJob.id == job_id,
-                    MusicJob.deleted_at.is_(None),
-                )
-                music_job = await db_session.scalar(query)
-                if music_job:
-                    await websocket.send_json(parsed_message.model_dump())
-            await websocket.send_json({"status": "PING"})
+        await listen_updates(
+            websocket=websocket,
+            channel=PubSub.Channels.MUSIC_JOB_UPDATE,
+            email=user.email,
+        )
     except WebSocketDisconnect:
-        subscriber.stop_listening()
+        pass
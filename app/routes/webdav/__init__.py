@@ -4,6 +4,7 @@ from fastapi import APIRouter, Body, Depends, HTTPException, status
 from sqlalchemy import select
 
 from app.db import WebDav
+from app.db.models.encrypted import credentials_cache
 from app.dependencies import AuthUser, DatabaseSession, get_authenticated_user
 from app.models.webdav import UpdateWebDav, WebDavResponse
 from app.services import httpclient
@@ -77,4 +78,5 @@ async def delete_webdav(user: AuthUser, session: DatabaseSession):
     if webdav := await session.scalar(query):
         await session.delete(webdav)
         await session.commit()
+        credentials_cache.invalidate(email=user.email)
     return None
@@ -17,14 +17,11 @@ from sqlalchemy.orm import joinedload
 
 from app.db import YoutubeChannel, YoutubeSubscription, YoutubeUserChannel
 from app.dependencies import AuthUser, DatabaseSession, get_authenticated_user
-from app.models.youtube import (
-    YoutubeChannelResponse,
-    YoutubeChannelUpdateResponse,
-    YoutubeUserChannelResponse,
-)
+from app.models.youtube import YoutubeChannelResponse, YoutubeUserChannelResponse
 from app.services import google
 from app.services.pubsub import PubSub
 from app.tasks import youtube
+from app.utils.websocket import listen_updates
 
 router = APIRouter(
     prefix="/channels",
@@ -37,24 +34,17 @@ router = APIRouter(
 async def listen_channels(
     user: AuthUser, websocket: WebSocket, db_session: DatabaseSession
 ):
+    # Give the connection back to the pool for as long as the socket is open
+    await db_session.close()
     await websocket.accept()
-    subscriber = PubSub(channels=[PubSub.Channels.YOUTUBE_CHANNEL_UPDATE])
     try:
-        async for message in subscriber.listen(ignore_subscribe_messages=True):
-            if message:
-                parsed_message = YoutubeChannelUpdateResponse.model_validate_json(
-                    message["data"]
-                )
-                channel_id = parsed_message.id
-                query = select(YoutubeSubscription).where(
-                    YoutubeSubscription.channel_id == channel_id,
-                    YoutubeSubscription.email == user.email,
-                )
-                if await db_session.scalar(query):
-                    await websocket.send_json(parsed_message)
-            await websocket.send_json({"status": "PING"})
+        await listen_updates(
+            websocket=websocket,
+            channel=PubSub.Channels.YOUTUBE_CHANNEL_UPDATE,
+            email=user.email,
+        )
     except WebSocketDisconnect:
-        await subscriber.stop_listening()
+        pass
 
 
 @router.get(
@@ -12,12 +12,13 @@ from fastapi import (
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 
-from app.db import YoutubeChannel, YoutubeSubscription
+from app.db import YoutubeChannel, YoutubeFeedVideo, YoutubeSubscription
 from app.dependencies import AuthUser, DatabaseSession, get_authenticated_user
 from app.models import Pagination
 from app.models.youtube import YoutubeChannelResponse, YoutubeSubscriptionsResponse
 from app.services import google
-from app.tasks.youtube import add_channel_videos
+from app.services.counts import CountCache, CountScope, invalidate_counts
+from app.tasks.youtube import request_channel_videos
 from app.utils.database import query_with_pagination
 
 router = APIRouter(
@@ -34,28 +35,34 @@ async def get_youtube_subscriptions(
     query_params: Annotated[Pagination, Query()],
 ):
     query = (
-        select(YoutubeSubscription)
-        .join(YoutubeChannel)
+        select(
+            YoutubeChannel.id,
+            YoutubeChannel.title,
+            YoutubeChannel.thumbnail,
+            YoutubeChannel.updating,
+        )
+        .join(YoutubeSubscription)
         .where(
             YoutubeSubscription.email == user.email,
             YoutubeSubscription.deleted_at.is_(None),
         )
         .order_by(YoutubeChannel.title)
-        .options(joinedload(YoutubeSubscription.channel))
     )
     paginated_results = await query_with_pagination(
         db_session=db_session,
         query=query,
         page=query_params.page,
         per_page=query_params.per_page,
+        count_cache=CountCache(scope=CountScope.SUBSCRIPTIONS, email=user.email),
+        estimate_total=query_params.estimate_total,
     )
-    return YoutubeSubscriptionsResponse(
+    return YoutubeSubscriptionsResponse.model_construct(
         channels=[
-            {"subscribed": True, **result.channel.__dict__}
-            for result in paginated_results.results
+            YoutubeChannelResponse.model_construct(subscribed=True, **row._mapping)
+            for row in paginated_results.results
         ],
         total_pages=paginated_results.total_pages,
-    )
+    ).json_response()
 
 
 @router.put(
@@ -84,6 +91,8 @@ async def add_user_subscription(
                     subscribed=True, **subscription.channel.__dict__
                 )
             subscription.deleted_at = None
+            # A manual re-subscription must survive the next sync
+            subscription.user_submitted = True
             channel = subscription.channel
         else:
             query = select(YoutubeChannel).where(YoutubeChannel.id == channel_info.id)
@@ -102,8 +111,14 @@ async def add_user_subscription(
                 user_submitted=True,
             )
             db_session.add(subscription)
+        await YoutubeFeedVideo.add_subscriptions(
+            db_session, email=user.email, channel_ids=[channel.id]
+        )
         await db_session.commit()
-        background_tasks.add_task(add_channel_videos.delay, channel_id=channel.id)
+        await invalidate_counts(
+            email=user.email, scopes=[CountScope.SUBSCRIPTIONS, CountScope.VIDEOS]
+        )
+        background_tasks.add_task(request_channel_videos, channel_id=channel.id)
         return YoutubeChannelResponse(subscribed=True, **subscription.channel.__dict__)
     raise HTTPException(
         detail="Channel not found.",
@@ -124,7 +139,13 @@ async def delete_user_subscription(
     )
     if subscription := await db_session.scalar(query):
         subscription.deleted_at = datetime.now(timezone.utc)
+        await YoutubeFeedVideo.remove_subscriptions(
+            db_session, email=user.email, channel_ids=[channel_id]
+        )
         await db_session.commit()
+        await invalidate_counts(
+            email=user.email, scopes=[CountScope.SUBSCRIPTIONS, CountScope.VIDEOS]
+        )
         return None
     raise HTTPException(
         detail="Subscription not found.",
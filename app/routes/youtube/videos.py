@@ -1,12 +1,12 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import Row, and_, select
+from sqlalchemy.orm import aliased
 
 from app.db import (
     YoutubeChannel,
-    YoutubeSubscription,
+    YoutubeFeedVideo,
     YoutubeVideo,
     YoutubeVideoCategory,
     YoutubeVideoLike,
@@ -17,11 +17,16 @@ from app.dependencies import AuthUser, DatabaseSession, get_authenticated_user
 from app.models.youtube import (
     GetVideos,
     YoutubeVideoCategoriesResponse,
+    YoutubeVideoCategoryResponse,
+    YoutubeVideoChannelResponse,
     YoutubeVideoDetailResponse,
     YoutubeVideoResponse,
     YoutubeVideosResponse,
 )
-from app.utils.database import query_with_pagination
+from app.services import relatedvideos
+from app.services.counts import CountCache, CountScope, invalidate_counts
+from app.settings import settings
+from app.utils.database import Keyset, query_with_pagination
 
 router = APIRouter(
     prefix="/videos",
@@ -30,6 +35,94 @@ router = APIRouter(
 )
 
 
+def _video_query(email: str):
+    watch = aliased(YoutubeVideoWatch)
+    like = aliased(YoutubeVideoLike)
+    queue = aliased(YoutubeVideoQueue)
+    return (
+        select(
+            YoutubeVideo.id,
+            YoutubeVideo.title,
+            YoutubeVideo.thumbnail,
+            YoutubeVideo.published_at,
+            YoutubeVideo.description,
+            YoutubeVideoCategory.id.label("category_id"),
+            YoutubeVideoCategory.name.label("category_name"),
+            YoutubeChannel.id.label("channel_id"),
+            YoutubeChannel.title.label("channel_title"),
+            YoutubeChannel.thumbnail.label("channel_thumbnail"),
+            watch.created_at.label("watched"),
+            like.created_at.label("liked"),
+            queue.created_at.label("queued"),
+        )
+        .select_from(YoutubeVideo)
+        .join(YoutubeVideoCategory, YoutubeVideoCategory.id == YoutubeVideo.category_id)
+        .join(YoutubeChannel, YoutubeChannel.id == YoutubeVideo.channel_id)
+        .outerjoin(watch, and_(watch.video_id == YoutubeVideo.id, watch.email == email))
+        .outerjoin(like, and_(like.video_id == YoutubeVideo.id, like.email == email))
+        .outerjoin(queue, and_(queue.video_id == YoutubeVideo.id, queue.email == email))
+    )
+
+
+def _video_response(row: Row, response_model=YoutubeVideoResponse):
+    # Rows come straight from the database, so they are not validated again
+    return response_model.model_construct(
+        id=row.id,
+        title=row.title,
+        thumbnail=row.thumbnail,
+        published_at=row.published_at,
+        description=row.description,
+        category=YoutubeVideoCategoryResponse.model_construct(
+            id=row.category_id, name=row.category_name
+        ),
+        channel=YoutubeVideoChannelResponse.model_construct(
+            id=row.channel_id, title=row.channel_title, thumbnail=row.channel_thumbnail
+        ),
+        watched=row.watched,
+        liked=row.liked,
+        queued=row.queued,
+    )
+
+
+def _video_list_query(email: str, query_params: GetVideos):
+    query = _video_query(email=email)
+    keyset = Keyset(columns=[YoutubeVideo.published_at, YoutubeVideo.id])
+    if query_params.channel_id:
+        query = query.where(YoutubeVideo.channel_id == query_params.channel_id)
+    elif not query_params.queued_only and not query_params.liked_only:
+        query = query.join(
+            YoutubeFeedVideo, YoutubeFeedVideo.video_id == YoutubeVideo.id
+        ).where(YoutubeFeedVideo.email == email)
+        keyset = Keyset(
+            columns=[YoutubeFeedVideo.published_at, YoutubeFeedVideo.video_id]
+        )
+    if query_params.video_categories:
+        query = query.where(YoutubeVideo.category_id.in_(query_params.video_categories))
+    if query_params.liked_only:
+        query = query.join(
+            YoutubeVideoLike, YoutubeVideoLike.video_id == YoutubeVideo.id
+        ).where(YoutubeVideoLike.email == email)
+        keyset = Keyset(columns=[YoutubeVideoLike.created_at, YoutubeVideo.id])
+    elif query_params.queued_only:
+        query = query.join(
+            YoutubeVideoQueue, YoutubeVideoQueue.video_id == YoutubeVideo.id
+        ).where(YoutubeVideoQueue.email == email)
+        keyset = Keyset(
+            columns=[YoutubeVideoQueue.created_at, YoutubeVideo.id],
+            descending=False,
+        )
+    return query, keyset
+
+
+def _related_videos_query(email: str, video_id: str, category_id: int, limit: int):
+    return (
+        _video_query(email=email)
+        .where(YoutubeVideo.id != video_id, YoutubeVideo.category_id == category_id)
+        .order_by(YoutubeVideo.published_at.desc())
+        .limit(limit)
+    )
+
+
 @router.get("/categories", response_model=YoutubeVideoCategoriesResponse)
 async def get_youtube_video_categories(db_session: DatabaseSession):
     query = (
@@ -47,64 +140,29 @@ async def get_youtube_videos(
     db_session: DatabaseSession,
     query_params: Annotated[GetVideos, Query()],
 ):
-    query = select(YoutubeVideo)
-    if query_params.channel_id:
-        query = query.where(YoutubeVideo.channel_id == query_params.channel_id)
-    else:
-        if not query_params.queued_only and not query_params.liked_only:
-            query = query.where(
-                YoutubeVideo.channel_id.in_(
-                    select(YoutubeChannel.id)
-                    .join(YoutubeSubscription)
-                    .where(
-                        YoutubeSubscription.email == user.email,
-                        YoutubeSubscription.deleted_at.is_(None),
-                    )
-                )
-            )
-    if query_params.video_categories:
-        query = query.where(YoutubeVideo.category_id.in_(query_params.video_categories))
-    if query_params.liked_only:
-        query = (
-            query.join(YoutubeVideoLike)
-            .where(YoutubeVideoLike.email == user.email)
-            .order_by(YoutubeVideoLike.created_at.desc())
-        )
-    elif query_params.queued_only:
-        query = (
-            query.join(YoutubeVideoQueue)
-            .where(YoutubeVideoQueue.email == user.email)
-            .order_by(YoutubeVideoQueue.created_at.asc())
-        )
-    else:
-        query = query.order_by(YoutubeVideo.published_at.desc())
-    query = query.order_by(YoutubeVideo.title.desc())
-    query = query.options(
-        joinedload(YoutubeVideo.channel),
-        joinedload(YoutubeVideo.category),
-        selectinload(YoutubeVideo.likes.and_(YoutubeVideoLike.email == user.email)),
-        selectinload(YoutubeVideo.queues.and_(YoutubeVideoQueue.email == user.email)),
-        selectinload(YoutubeVideo.watches.and_(YoutubeVideoWatch.email == user.email)),
-    )
+    query, keyset = _video_list_query(email=user.email, query_params=query_params)
     paginated_results = await query_with_pagination(
         db_session=db_session,
         query=query,
         page=query_params.page,
         per_page=query_params.per_page,
+        keyset=keyset,
+        cursor=query_params.cursor,
+        include_total=query_params.include_total,
+        count_cache=CountCache(
+            scope=CountScope.VIDEOS,
+            email=user.email,
+            filters=query_params.model_dump(
+                include={"channel_id", "video_categories", "liked_only", "queued_only"}
+            ),
+        ),
+        estimate_total=query_params.estimate_total,
     )
-    videos = []
-    for result in paginated_results.results:
-        watched = result.watches[0].created_at if result.watches else None
-        liked = result.likes[0].created_at if result.likes else None
-        queued = result.queues[0].created_at if result.queues else None
-        video_result = YoutubeVideoResponse.model_validate(result)
-        video_result.watched = watched
-        video_result.liked = liked
-        video_result.queued = queued
-        videos.append(video_result)
-    return YoutubeVideosResponse(
-        videos=videos, total_pages=paginated_results.total_pages
-    )
+    return YoutubeVideosResponse.model_construct(
+        videos=[_video_response(row=row) for row in paginated_results.results],
+        total_pages=paginated_results.total_pages,
+        next_cursor=paginated_results.next_cursor,
+    ).json_response()
 
 
 @router.get(
@@ -118,70 +176,37 @@ async def get_youtube_video(
     video_id: Annotated[str, Path()],
     related_videos_length: Annotated[int, Query(ge=0)] = 5,
 ):
-    query = (
-        select(YoutubeVideo)
-        .where(YoutubeVideo.id == video_id)
-        .options(
-            joinedload(YoutubeVideo.channel),
-            joinedload(YoutubeVideo.category),
-            selectinload(YoutubeVideo.likes.and_(YoutubeVideoLike.email == user.email)),
-            selectinload(
-                YoutubeVideo.watches.and_(YoutubeVideoWatch.email == user.email)
-            ),
-            selectinload(
-                YoutubeVideo.queues.and_(YoutubeVideoQueue.email == user.email)
-            ),
-        )
-    )
-    if video := await db_session.scalar(query):
-        watched = video.watches[0].created_at if video.watches else None
-        liked = video.likes[0].created_at if video.likes else None
-        queued = video.queues[0].created_at if video.queues else None
-        video = YoutubeVideoDetailResponse.model_validate(video)
-        video.watched = watched
-        video.liked = liked
-        video.queued = queued
-        if related_videos_length > 0:
-            query = (
-                select(YoutubeVideo)
-                .where(
-                    YoutubeVideo.id != video.id,
-                    YoutubeVideo.category_id == video.category.id,
-                )
-                .order_by(YoutubeVideo.published_at.desc())
-                .limit(related_videos_length)
-                .options(
-                    joinedload(YoutubeVideo.channel),
-                    joinedload(YoutubeVideo.category),
-                    selectinload(
-                        YoutubeVideo.likes.and_(YoutubeVideoLike.email == user.email)
-                    ),
-                    selectinload(
-                        YoutubeVideo.watches.and_(YoutubeVideoWatch.email == user.email)
-                    ),
-                    selectinload(
-                        YoutubeVideo.queues.and_(YoutubeVideoQueue.email == user.email)
-                    ),
+    query = _video_query(email=user.email).where(YoutubeVideo.id == video_id)
+    if row := (await db_session.execute(query)).first():
+        video = _video_response(row=row, response_model=YoutubeVideoDetailResponse)
+        if 0 < related_videos_length <= settings.youtube_related_videos_cache_size:
+            related_video_ids = [
+                related_video_id
+                for related_video_id in await relatedvideos.get_related_video_ids(
+                    db_session=db_session, category_id=video.category.id
                 )
+                if related_video_id != video.id
+            ][:related_videos_length]
+            query = _video_query(email=user.email).where(
+                YoutubeVideo.id.in_(related_video_ids)
             )
-            results = (await db_session.scalars(query)).all()
-            for related_video in results:
-                watched = (
-                    related_video.watches[0].created_at
-                    if related_video.watches
-                    else None
-                )
-                liked = (
-                    related_video.likes[0].created_at if related_video.likes else None
-                )
-                queued = (
-                    related_video.queues[0].created_at if related_video.queues else None
-                )
-                related_video = YoutubeVideoResponse.model_validate(related_video)
-                related_video.watched = watched
-                related_video.liked = liked
-                related_video.queued = queued
-                video.related_videos.append(related_video)
+            rows = {row.id: row for row in await db_session.execute(query)}
+            video.related_videos = [
+                _video_response(row=rows[related_video_id])
+                for related_video_id in related_video_ids
+                if related_video_id in rows
+            ]
+        elif related_videos_length > 0:
+            query = _related_videos_query(
+                email=user.email,
+                video_id=video.id,
+                category_id=video.category.id,
+                limit=related_videos_length,
+            )
+            video.related_videos = [
+                _video_response(row=row)
+                for row in (await db_session.execute(query)).all()
+            ]
         return video
     raise HTTPException(
         detail="Youtube video not found.", status_code=status.HTTP_404_NOT_FOUND
@@ -226,6 +251,7 @@ async def add_youtube_video_like(
         if not await db_session.scalar(query):
             db_session.add(YoutubeVideoLike(email=user.email, video_id=video.id))
             await db_session.commit()
+            await invalidate_counts(email=user.email, scopes=[CountScope.VIDEOS])
         return None
     raise HTTPException(
         detail="Youtube video not found.", status_code=status.HTTP_404_NOT_FOUND
@@ -248,6 +274,7 @@ async def delete_youtube_video_like(
     if like := await db_session.scalar(query):
         await db_session.delete(like)
         await db_session.commit()
+        await invalidate_counts(email=user.email, scopes=[CountScope.VIDEOS])
         return None
     raise HTTPException(
         detail="Youtube video like not found.", status_code=status.HTTP_404_NOT_FOUND
@@ -270,6 +297,7 @@ async def add_youtube_video_queue(
         if not await db_session.scalar(query):
             db_session.add(YoutubeVideoQueue(email=user.email, video_id=video.id))
             await db_session.commit()
+            await invalidate_counts(email=user.email, scopes=[CountScope.VIDEOS])
         return None
     raise HTTPException(
         detail="Youtube video not found.", status_code=status.HTTP_404_NOT_FOUND
@@ -292,6 +320,7 @@ async def delete_youtube_video_queue(
     if queued := await db_session.scalar(query):
         await db_session.delete(queued)
         await db_session.commit()
+        await invalidate_counts(email=user.email, scopes=[CountScope.VIDEOS])
         return None
     raise HTTPException(
         detail="Youtube video queue not found.", status_code=status.HTTP_404_NOT_FOUND
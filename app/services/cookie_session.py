@@ -1,33 +1,91 @@
-from contextlib import asynccontextmanager
-from datetime import datetime
-from uuid import uuid4
+import hashlib
+import secrets
+from dataclasses import dataclass
 
-from redis.asyncio import Redis
-
-from app.services import jwt
+from app.services import redisclient
 from app.settings import settings
 
+SESSION_KEY = "session:{session_id}"
+USER_SESSIONS_KEY = "user_sessions:{email}"
+
+# The user's index is only known from the session, so both TTLs are slid in
+# the same round trip as the lookup. The index has to outlive every session
+# it points to.
+_GET_SESSION = """
+local values = redis.call("HGETALL", KEYS[1])
+if #values == 0 then
+    return values
+end
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+local email = redis.call("HGET", KEYS[1], "email")
+redis.call("EXPIRE", ARGV[1] .. email, ARGV[2])
+return values
+"""
+
+
+@dataclass
+class Session:
+    email: str
+    admin: bool
+
+
+def _session_id(token: str):
+    # Only a digest of the token is stored so a leaked keyspace can't be replayed
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def create(email: str, admin: bool = False):
+    token = secrets.token_urlsafe(32)
+    session_id = _session_id(token)
+    session_key = SESSION_KEY.format(session_id=session_id)
+    user_sessions_key = USER_SESSIONS_KEY.format(email=email)
+    async with (
+        redisclient.get_redis() as redis,
+        redis.pipeline(transaction=True) as pipe,
+    ):
+        pipe.hset(session_key, mapping={"email": email, "admin": int(admin)})
+        pipe.expire(session_key, settings.session_ttl)
+        pipe.sadd(user_sessions_key, session_id)
+        pipe.expire(user_sessions_key, settings.session_ttl)
+        await pipe.execute()
+    return token
+
 
-@asynccontextmanager
-async def _get_redis():
-    redis = Redis.from_url(settings.redis_url)
-    try:
-        yield redis
-    finally:
-        await redis.aclose()
+async def get(token: str) -> Session | None:
+    session_key = SESSION_KEY.format(session_id=_session_id(token))
+    async with redisclient.get_redis() as redis:
+        values = await redis.eval(
+            _GET_SESSION,
+            1,
+            session_key,
+            USER_SESSIONS_KEY.format(email=""),
+            settings.session_ttl,
+        )
+    if not values:
+        return None
+    values = dict(zip(values[::2], values[1::2]))
+    return Session(email=values[b"email"].decode(), admin=values[b"admin"] == b"1")
 
 
-async def create(jwt_token: str):
-    if payload := await jwt.decode(jwt_token):
-        expires = payload.exp
-        token_exp = expires - datetime.now().timestamp()
-        token_id = str(uuid4())
-        async with _get_redis() as redis:
-            await redis.set(token_id, jwt_token, ex=int(token_exp))
-            return token_id
-    return None
+async def revoke(token: str):
+    session_id = _session_id(token)
+    session_key = SESSION_KEY.format(session_id=session_id)
+    async with redisclient.get_redis() as redis:
+        if email := await redis.hget(session_key, "email"):
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(session_key)
+                pipe.srem(USER_SESSIONS_KEY.format(email=email.decode()), session_id)
+                await pipe.execute()
 
 
-async def get(token: str) -> str | None:
-    async with _get_redis() as redis:
-        return await redis.get(token)
+async def revoke_user(email: str):
+    user_sessions_key = USER_SESSIONS_KEY.format(email=email)
+    async with redisclient.get_redis() as redis:
+        session_ids = await redis.smembers(user_sessions_key)
+        await redis.delete(
+            user_sessions_key,
+            *[
+                SESSION_KEY.format(session_id=session_id.decode())
+                for session_id in session_ids
+            ],
+        )
@@ -0,0 +1,57 @@
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from app.services import redisclient
+from app.settings import settings
+
+COUNT_KEY = "count:{scope}:{email}:{version}:{digest}"
+COUNT_VERSION_KEY = "count_version:{scope}:{email}"
+
+
+class CountScope:
+    MUSIC_JOBS = "music_jobs"
+    SUBSCRIPTIONS = "subscriptions"
+    VIDEOS = "videos"
+
+
+@dataclass
+class CountCache:
+    scope: str
+    email: str
+    filters: dict = field(default_factory=dict)
+
+    def _key(self, version: int, estimate: bool):
+        filters = json.dumps(
+            {**self.filters, "estimate": estimate}, sort_keys=True, default=str
+        )
+        return COUNT_KEY.format(
+            scope=self.scope,
+            email=self.email,
+            version=version,
+            digest=hashlib.sha1(filters.encode()).hexdigest(),
+        )
+
+    async def count(self, count: Callable[[], Awaitable[int]], estimate=False):
+        version_key = COUNT_VERSION_KEY.format(scope=self.scope, email=self.email)
+        async with redisclient.get_redis() as redis:
+            version = int(await redis.get(version_key) or 0)
+            key = self._key(version=version, estimate=estimate)
+            if (cached := await redis.get(key)) is not None:
+                return int(cached)
+        # A write during the count bumps the version, so the result is never read
+        value = await count()
+        async with redisclient.get_redis() as redis:
+            await redis.set(key, value, ex=settings.pagination_count_cache_ttl)
+        return value
+
+
+async def invalidate_counts(email: str, scopes: list[str]):
+    async with (
+        redisclient.get_redis() as redis,
+        redis.pipeline(transaction=False) as pipe,
+    ):
+        for scope in scopes:
+            pipe.incr(COUNT_VERSION_KEY.format(scope=scope, email=email))
+        await pipe.execute()
@@ -1,17 +1,238 @@
+import asyncio
+import json
 import logging
+import random
 import traceback
-from urllib.parse import urljoin
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.parse import urlencode, urljoin
 
+import httpx
 from bs4 import BeautifulSoup
 from pydantic import BaseModel
 
-from app.services import httpclient
+from app.services import redisclient
 from app.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
 YOUTUBE_API = "https://youtube.googleapis.com"
+QUOTA_EXCEEDED_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+RATE_LIMITED_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+class QuotaExceededError(Exception):
+    pass
+
+
+RATE_LIMIT_KEY = "youtube_api:rate_limit"
+QUOTA_EXCEEDED_KEY = "youtube_api:quota_exceeded"
+
+# Takes a token from the bucket shared by every process, returning how long to
+# wait for one, or -1 while the quota is exhausted. Lua truncates numbers
+# returned to Redis, so the wait is returned as a string.
+_ACQUIRE_TOKEN = """
+if redis.call("EXISTS", KEYS[2]) == 1 then
+    return "-1"
+end
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated_at", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+
+    async def acquire(self):
+        while True:
+            async with redisclient.get_redis() as redis:
+                wait = float(
+                    await redis.eval(
+                        _ACQUIRE_TOKEN,
+                        2,
+                        RATE_LIMIT_KEY,
+                        QUOTA_EXCEEDED_KEY,
+                        self.rate,
+                        self.capacity,
+                    )
+                )
+            if wait < 0:
+                raise QuotaExceededError("Youtube API quota exceeded")
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+
+async def _block_quota():
+    async with redisclient.get_redis() as redis:
+        await redis.set(QUOTA_EXCEEDED_KEY, 1, ex=settings.google_api_quota_backoff)
+
+
+@dataclass
+class YoutubeApiClient:
+    client: httpx.AsyncClient
+    semaphore: asyncio.Semaphore
+    loop: asyncio.AbstractEventLoop
+
+
+_api_client: YoutubeApiClient | None = None
+# The quota belongs to the API key, so every process draws from one bucket
+_limiter = TokenBucket(
+    rate=settings.google_api_daily_quota / 86400,
+    capacity=settings.google_api_rate_limit_burst,
+)
+
+
+async def _get_api_client():
+    global _api_client
+    loop = asyncio.get_running_loop()
+    # Pooled connections belong to the loop that opened them
+    if _api_client is None or _api_client.loop is not loop:
+        if _api_client is not None:
+            with suppress(RuntimeError):
+                await _api_client.client.aclose()
+        _api_client = YoutubeApiClient(
+            client=httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    retries=3,
+                    limits=httpx.Limits(
+                        max_connections=settings.google_api_max_concurrency,
+                        max_keepalive_connections=settings.google_api_max_concurrency,
+                    ),
+                ),
+                follow_redirects=True,
+            ),
+            semaphore=asyncio.Semaphore(settings.google_api_max_concurrency),
+            loop=loop,
+        )
+    return _api_client
+
+
+async def close_client():
+    global _api_client
+    if _api_client is not None:
+        await _api_client.client.aclose()
+        _api_client = None
+
+
+def _get_error_reason(response: httpx.Response):
+    try:
+        return response.json()["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+async def _get(path: str, params: dict, headers: dict | None = None):
+    api_client = await _get_api_client()
+    for attempt in range(settings.google_api_max_retries + 1):
+        await _limiter.acquire()
+        async with api_client.semaphore:
+            response = await api_client.client.get(
+                urljoin(YOUTUBE_API, path), params=params, headers=headers
+            )
+        reason = _get_error_reason(response) if response.is_error else None
+        if response.status_code == httpx.codes.FORBIDDEN and (
+            reason in QUOTA_EXCEEDED_REASONS
+        ):
+            await _block_quota()
+            raise QuotaExceededError("Youtube API quota exceeded")
+        if response.status_code == httpx.codes.TOO_MANY_REQUESTS or (
+            response.status_code == httpx.codes.FORBIDDEN
+            and reason in RATE_LIMITED_REASONS
+        ):
+            if attempt == settings.google_api_max_retries:
+                break
+            retry_after = response.headers.get("Retry-After", "")
+            delay = (
+                float(retry_after)
+                if retry_after.isdigit()
+                else 2**attempt + random.random()
+            )
+            logger.warning("Youtube API rate limited, retrying in %.2fs", delay)
+            await asyncio.sleep(delay)
+            continue
+        break
+    # A conditional request answered with 304 is for the caller to handle
+    if not (
+        response.status_code == httpx.codes.NOT_MODIFIED
+        and headers
+        and "If-None-Match" in headers
+    ):
+        response.raise_for_status()
+    return response
+
+
+def _cache_key(path: str, params: dict):
+    cache_params = sorted((k, v) for k, v in params.items() if k != "key")
+    return f"youtube_api:{path}?{urlencode(cache_params)}"
+
+
+@dataclass
+class DeferredETags:
+    # Holds fetched pages' ETags until the caller has stored what they returned
+    entries: dict[str, str] = field(default_factory=dict)
+
+    async def save(self):
+        if not self.entries:
+            return
+        async with (
+            redisclient.get_redis() as redis,
+            redis.pipeline(transaction=False) as pipe,
+        ):
+            for key, value in self.entries.items():
+                pipe.set(key, value, ex=settings.google_api_cache_ttl)
+            await pipe.execute()
+        self.entries.clear()
+
+
+async def _get_conditional(
+    path: str,
+    params: dict,
+    parse: Callable[[dict], dict],
+    etags: DeferredETags | None = None,
+):
+    key = _cache_key(path=path, params=params)
+    async with redisclient.get_redis() as redis:
+        cached = await redis.get(key)
+    cached = json.loads(cached) if cached else None
+    headers = {"If-None-Match": cached["etag"]} if cached else None
+    response = await _get(path, params=params, headers=headers)
+    if cached and response.status_code == httpx.codes.NOT_MODIFIED:
+        return cached["data"], False
+    data = parse(response.json())
+    if etag := response.headers.get("ETag"):
+        value = json.dumps({"etag": etag, "data": data})
+        if etags is not None:
+            etags.entries[key] = value
+        else:
+            async with redisclient.get_redis() as redis:
+                await redis.set(key, value, ex=settings.google_api_cache_ttl)
+    return data, True
+
+
+async def _get_page(url: str):
+    api_client = await _get_api_client()
+    async with api_client.semaphore:
+        return await api_client.client.get(url=url)
 
 
 class YoutubeChannelInfo(BaseModel):
@@ -26,35 +247,31 @@ async def get_channel_subscriptions(channel_id: str):
         "channelId": channel_id,
         "key": settings.google_api_key,
     }
-    async with httpclient.AsyncClient() as client:
-        while True:
-            response = await client.get(
-                urljoin(YOUTUBE_API, "/youtube/v3/subscriptions"), params=params
-            )
-            response.raise_for_status()
-            json = response.json()
-            channels: list[YoutubeChannelInfo] = []
-            for item in json.get("items", []):
-                snippet = item.get("snippet")
-                resource_id = snippet.get("resourceId")
-                channel_id = resource_id.get("channelId")
-                channel_title = snippet.get("title")
-                thumbnails = snippet.get("thumbnails")
-                channel_thumbnail = thumbnails.get("high", {}).get("url")
-                try:
-                    channels.append(
-                        YoutubeChannelInfo(
-                            id=channel_id,
-                            title=channel_title,
-                            thumbnail=channel_thumbnail,
-                        )
+    while True:
+        response = await _get("/youtube/v3/subscriptions", params=params)
+        json = response.json()
+        channels: list[YoutubeChannelInfo] = []
+        for item in json.get("items", []):
+            snippet = item.get("snippet")
+            resource_id = snippet.get("resourceId")
+            channel_id = resource_id.get("channelId")
+            channel_title = snippet.get("title")
+            thumbnails = snippet.get("thumbnails")
+            channel_thumbnail = thumbnails.get("high", {}).get("url")
+            try:
+                channels.append(
+                    YoutubeChannelInfo(
+                        id=channel_id,
+                        title=channel_title,
+                        thumbnail=channel_thumbnail,
                     )
-                except TypeError:
-                    logger.exception(traceback.format_exc())
-            yield channels
-            params["pageToken"] = json.get("nextPageToken")
-            if params.get("pageToken", None) is None:
-                break
+                )
+            except TypeError:
+                logger.exception(traceback.format_exc())
+        yield channels
+        params["pageToken"] = json.get("nextPageToken")
+        if params.get("pageToken", None) is None:
+            break
 
 
 async def get_channel_info(channel_id: str):
@@ -63,47 +280,60 @@ async def get_channel_info(channel_id: str):
         url += channel_id
     else:
         url += f"channel/{channel_id}"
-    async with httpclient.AsyncClient() as client:
-        response = await client.get(url=url)
-        if response.is_error:
-            return None
-        html = response.text
-        soup = BeautifulSoup(html, "html.parser")
-        channel_id_tag = soup.find("meta", itemprop="identifier")
-        if not channel_id_tag:
-            channel_id_tag = soup.find("meta", itemprop="channelId")
-        name_tag = soup.find("meta", itemprop="name")
-        thumbnail_tag = soup.find("link", itemprop="thumbnailUrl")
-        try:
-            return YoutubeChannelInfo(
-                id=channel_id_tag["content"],
-                title=name_tag["content"],
-                thumbnail=thumbnail_tag["href"],
-            )
-        except TypeError:
-            logger.exception(traceback.format_exc())
-            return None
+    response = await _get_page(url=url)
+    if response.is_error:
+        return None
+    html = response.text
+    soup = BeautifulSoup(html, "html.parser")
+    channel_id_tag = soup.find("meta", itemprop="identifier")
+    if not channel_id_tag:
+        channel_id_tag = soup.find("meta", itemprop="channelId")
+    name_tag = soup.find("meta", itemprop="name")
+    thumbnail_tag = soup.find("link", itemprop="thumbnailUrl")
+    try:
+        return YoutubeChannelInfo(
+            id=channel_id_tag["content"],
+            title=name_tag["content"],
+            thumbnail=thumbnail_tag["href"],
+        )
+    except TypeError:
+        logger.exception(traceback.format_exc())
+        return None
 
 
 async def _get_channel_upload_playlist_id(channel_id: str):
+    # The uploads playlist of a channel never changes
+    key = f"youtube_api:uploads_playlist:{channel_id}"
+    async with redisclient.get_redis() as redis:
+        if uploads_playlist_id := await redis.get(key):
+            return uploads_playlist_id.decode()
     params = {
         "part": "contentDetails",
         "id": channel_id,
         "key": settings.google_api_key,
     }
-    async with httpclient.AsyncClient() as client:
-        response = await client.get(
-            urljoin(YOUTUBE_API, "/youtube/v3/channels"), params=params
-        )
-        response.raise_for_status()
-        json = response.json()
-        uploads_playlist_id = json["items"][0]["contentDetails"]["relatedPlaylists"][
-            "uploads"
-        ]
-        return uploads_playlist_id
+    response = await _get("/youtube/v3/channels", params=params)
+    json = response.json()
+    uploads_playlist_id = json["items"][0]["contentDetails"]["relatedPlaylists"][
+        "uploads"
+    ]
+    async with redisclient.get_redis() as redis:
+        await redis.set(key, uploads_playlist_id)
+    return uploads_playlist_id
 
 
-async def _get_channel_upload_playlist_videos(channel_id: str):
+def _parse_playlist_videos(json: dict):
+    video_ids = []
+    for item in json.get("items", []):
+        content_details = item.get("contentDetails")
+        video_id = content_details.get("videoId")
+        video_ids.append(video_id)
+    return {"video_ids": video_ids, "next_page_token": json.get("nextPageToken")}
+
+
+async def _get_channel_upload_playlist_videos(
+    channel_id: str, etags: DeferredETags | None = None
+):
     channel_upload_playlist_id = await _get_channel_upload_playlist_id(channel_id)
     params = {
         "part": "contentDetails",
@@ -111,22 +341,17 @@ async def _get_channel_upload_playlist_videos(channel_id: str):
         "maxResults": 50,
         "key": settings.google_api_key,
     }
-    async with httpclient.AsyncClient() as client:
-        while True:
-            response = await client.get(
-                urljoin(YOUTUBE_API, "/youtube/v3/playlistItems"), params=params
-            )
-            response.raise_for_status()
-            json = response.json()
-            video_ids = []
-            for item in json.get("items", []):
-                content_details = item.get("contentDetails")
-                video_id = content_details.get("videoId")
-                video_ids.append(video_id)
-            yield video_ids
-            params["pageToken"] = json.get("nextPageToken")
-            if params.get("pageToken", None) is None:
-                break
+    while True:
+        page, modified = await _get_conditional(
+            "/youtube/v3/playlistItems",
+            params=params,
+            parse=_parse_playlist_videos,
+            etags=etags,
+        )
+        yield page["video_ids"], modified
+        params["pageToken"] = page["next_page_token"]
+        if params.get("pageToken", None) is None:
+            break
 
 
 class YoutubeVideoInfo(BaseModel):
@@ -138,43 +363,76 @@ class YoutubeVideoInfo(BaseModel):
     published: str
 
 
-async def get_channel_latest_videos(channel_id: str):
-    async for video_ids in _get_channel_upload_playlist_videos(channel_id):
-        params = {
-            "part": "snippet",
-            "id": ",".join(video_ids),
-            "key": settings.google_api_key,
-        }
-        async with httpclient.AsyncClient() as client:
-            response = await client.get(
-                urljoin(YOUTUBE_API, "/youtube/v3/videos"), params=params
+async def _get_videos(video_ids: list[str]):
+    if not video_ids:
+        return []
+    params = {
+        "part": "snippet",
+        "id": ",".join(video_ids),
+        "key": settings.google_api_key,
+    }
+    response = await _get("/youtube/v3/videos", params=params)
+    json = response.json()
+    videos: list[YoutubeVideoInfo] = []
+    for item in json.get("items", []):
+        snippet = item.get("snippet")
+        video_id = item.get("id")
+        title = snippet.get("title")
+        category_id = int(snippet.get("categoryId"))
+        description = snippet.get("description")
+        published = snippet.get("publishedAt")
+        thumbnails = snippet.get("thumbnails")
+        video_thumbnail = thumbnails.get("high", {}).get("url")
+        try:
+            videos.append(
+                YoutubeVideoInfo(
+                    id=video_id,
+                    title=title,
+                    thumbnail=video_thumbnail,
+                    category_id=category_id,
+                    description=description,
+                    published=published,
+                )
             )
-            response.raise_for_status()
-            json = response.json()
-            videos: list[YoutubeVideoInfo] = []
-            for item in json.get("items", []):
-                snippet = item.get("snippet")
-                video_id = item.get("id")
-                title = snippet.get("title")
-                category_id = int(snippet.get("categoryId"))
-                description = snippet.get("description")
-                published = snippet.get("publishedAt")
-                thumbnails = snippet.get("thumbnails")
-                video_thumbnail = thumbnails.get("high", {}).get("url")
-                try:
-                    videos.append(
-                        YoutubeVideoInfo(
-                            id=video_id,
-                            title=title,
-                            thumbnail=video_thumbnail,
-                            category_id=category_id,
-                            description=description,
-                            published=published,
-                        )
-                    )
-                except TypeError:
-                    logger.exception(traceback.format_exc())
-            yield videos
+        except TypeError:
+            logger.exception(traceback.format_exc())
+    return videos
+
+
+async def get_channel_latest_videos(
+    channel_id: str, conditional: bool = True, etags: DeferredETags | None = None
+):
+    # Video details for a page are fetched while the next playlist page loads
+    pending_videos: asyncio.Task | None = None
+    # The prefetched page's ETag is only handed to the caller once they ask for
+    # the page after it, so a crawl stopping early never marks it as seen
+    page_etags = DeferredETags() if etags is not None else None
+    pending_etags: dict[str, str] = {}
+    try:
+        async for video_ids, modified in _get_channel_upload_playlist_videos(
+            channel_id, etags=page_etags
+        ):
+            # Every page after an unchanged page was seen in a previous crawl
+            if conditional and not modified:
+                break
+            videos_task = asyncio.create_task(_get_videos(video_ids))
+            fetched_etags = {}
+            if page_etags is not None:
+                fetched_etags = dict(page_etags.entries)
+                page_etags.entries.clear()
+            if pending_videos:
+                yield await pending_videos
+                if etags is not None:
+                    etags.entries.update(pending_etags)
+            pending_videos, pending_etags = videos_task, fetched_etags
+        if pending_videos:
+            videos_task, pending_videos = pending_videos, None
+            yield await videos_task
+            if etags is not None:
+                etags.entries.update(pending_etags)
+    finally:
+        if pending_videos:
+            pending_videos.cancel()
 
 
 class YoutubeVideoCategory(BaseModel):
@@ -188,18 +446,22 @@ async def get_video_category(category_id: str):
         "id": category_id,
         "key": settings.google_api_key,
     }
-    async with httpclient.AsyncClient() as client:
-        response = await client.get(
-            urljoin(YOUTUBE_API, "/youtube/v3/videoCategories"), params=params
-        )
-        response.raise_for_status()
-        json = response.json()
-        category = json["items"][0]["snippet"]["title"]
-        try:
-            return YoutubeVideoCategory(id=category_id, name=category)
-        except TypeError:
-            logger.exception(traceback.format_exc())
-            return None
+    response = await _get("/youtube/v3/videoCategories", params=params)
+    json = response.json()
+    category = json["items"][0]["snippet"]["title"]
+    try:
+        return YoutubeVideoCategory(id=category_id, name=category)
+    except TypeError:
+        logger.exception(traceback.format_exc())
+        return None
+
+
+def _parse_video_categories(json: dict):
+    categories = [
+        {"id": int(item.get("id")), "name": item.get("snippet").get("title")}
+        for item in json.get("items", [])
+    ]
+    return {"categories": categories, "next_page_token": json.get("nextPageToken")}
 
 
 async def get_video_categories():
@@ -208,38 +470,32 @@ async def get_video_categories():
         "regionCode": "US",
         "key": settings.google_api_key,
     }
-    async with httpclient.AsyncClient() as client:
-        while True:
-            response = await client.get(
-                urljoin(YOUTUBE_API, "/youtube/v3/videoCategories"), params=params
-            )
-            response.raise_for_status()
-            json = response.json()
-            categories: list[YoutubeVideoCategory] = []
-            for item in json.get("items", []):
-                category_id = int(item.get("id"))
-                category_name = item.get("snippet").get("title")
-                try:
-                    categories.append(
-                        YoutubeVideoCategory(id=category_id, name=category_name)
-                    )
-                except TypeError:
-                    logger.exception(traceback.format_exc())
-            yield categories
-            params["pageToken"] = json.get("nextPageToken")
-            if params.get("pageToken", None) is None:
-                break
+    while True:
+        page, _ = await _get_conditional(
+            "/youtube/v3/videoCategories",
+            params=params,
+            parse=_parse_video_categories,
+        )
+        categories: list[YoutubeVideoCategory] = []
+        for category in page["categories"]:
+            try:
+                categories.append(YoutubeVideoCategory(**category))
+            except TypeError:
+                logger.exception(traceback.format_exc())
+        yield categories
+        params["pageToken"] = page["next_page_token"]
+        if params.get("pageToken", None) is None:
+            break
 
 
 async def get_video_uploader(video_id: str):
     url = "https://www.youtube.com/watch?v=" + video_id
-    async with httpclient.AsyncClient() as client:
-        response = await client.get(url=url)
-        if response.is_error:
-            return None
-        html = response.text
-        soup = BeautifulSoup(html, "html.parser")
-        if author_span := soup.find("span", itemprop="author"):
-            if author_name_link := author_span.find("link", itemprop="name"):
-                return author_name_link.attrs.get("content")
+    response = await _get_page(url=url)
+    if response.is_error:
         return None
+    html = response.text
+    soup = BeautifulSoup(html, "html.parser")
+    if author_span := soup.find("span", itemprop="author"):
+        if author_name_link := author_span.find("link", itemprop="name"):
+            return author_name_link.attrs.get("content")
+    return None
@@ -1,7 +1,13 @@
+import asyncio
 from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import BinaryIO
 
+import aiofiles
 import httpx
 
+CHUNK_SIZE = 1024 * 1024
+
 
 @asynccontextmanager
 async def AsyncClient():
@@ -9,3 +15,17 @@ async def AsyncClient():
         transport=httpx.AsyncHTTPTransport(retries=3), follow_redirects=True
     ) as client:
         yield client
+
+
+async def download_file(url: str, file_path: str | Path):
+    async with AsyncClient() as client:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            async with aiofiles.open(file_path, mode="wb") as f:
+                async for chunk in response.aiter_bytes(chunk_size=CHUNK_SIZE):
+                    await f.write(chunk)
+
+
+async def iter_file(file: BinaryIO, chunk_size: int = CHUNK_SIZE):
+    while chunk := await asyncio.to_thread(file.read, chunk_size):
+        yield chunk
@@ -1,4 +1,6 @@
-import asyncio
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
 import jwt
@@ -14,9 +16,12 @@ class JWTPayload(BaseModel):
     exp: float
 
 
+_verified_tokens: OrderedDict[bytes, JWTPayload] = OrderedDict()
+
+
 async def create(email: str):
-    return await asyncio.to_thread(
-        jwt.encode,
+    # HS256 is a single HMAC, cheaper than a hop through the thread pool
+    return jwt.encode(
         payload=JWTPayload(
             sub=email,
             exp=(datetime.now(timezone.utc) + timedelta(days=14)).timestamp(),
@@ -27,14 +32,24 @@ async def create(email: str):
 
 
 async def decode(token: str):
+    digest = hashlib.sha256(token.encode()).digest()
+    if payload := _verified_tokens.get(digest):
+        if payload.exp > time.time():
+            _verified_tokens.move_to_end(digest)
+            return payload
+        del _verified_tokens[digest]
     try:
-        payload = await asyncio.to_thread(
-            jwt.decode,
-            token,
-            key=settings.secret_key,
-            algorithms=[ALGORITHM],
-            options={"verify_exp": True},
+        payload = JWTPayload(
+            **jwt.decode(
+                token,
+                key=settings.secret_key,
+                algorithms=[ALGORITHM],
+                options={"verify_exp": True},
+            )
         )
-        return JWTPayload(**payload)
     except jwt.PyJWTError:
         return None
+    _verified_tokens[digest] = payload
+    while len(_verified_tokens) > settings.jwt_cache_size:
+        _verified_tokens.popitem(last=False)
+    return payload
@@ -0,0 +1,61 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from app.settings import settings
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_executor():
+    global _executor
+    # bcrypt releases the GIL, so a small pool keeps hashing off the event loop
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            thread_name_prefix="password-hash",
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _hash_password(password: str, rounds: int):
+    return str(
+        bcrypt.hashpw(bytes(password, encoding="utf-8"), bcrypt.gensalt(rounds)),
+        encoding="utf-8",
+    )
+
+
+def _check_password(password: str, hashed_password: str):
+    return bcrypt.checkpw(
+        bytes(password, encoding="utf-8"),
+        bytes(hashed_password, encoding="utf-8"),
+    )
+
+
+async def _run(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+async def hash_password(password: str):
+    return await _run(_hash_password, password, settings.password_hash_rounds)
+
+
+async def check_password(password: str, hashed_password: str):
+    return await _run(_check_password, password, hashed_password)
+
+
+def needs_rehash(hashed_password: str):
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.password_hash_rounds
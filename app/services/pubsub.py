@@ -1,9 +1,13 @@
 import asyncio
-from contextlib import asynccontextmanager
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager, suppress
 
-from redis.asyncio import Redis
+from redis.asyncio.client import PubSub as RedisPubSub
 
-from app.settings import settings
+from app.services import redisclient
+
+logger = logging.getLogger(__name__)
 
 
 class PubSub:
@@ -14,17 +18,8 @@ class PubSub:
     def __init__(self, channels: list[str]):
         self.channels = channels
 
-    @asynccontextmanager
-    async def _get_redis(self):
-        redis = Redis.from_url(settings.redis_url)
-        try:
-            yield redis
-        finally:
-            await redis.aclose()
-
     async def listen(self, ignore_subscribe_messages=False, timeout=60):
-        async with self._get_redis() as redis:
-            pubsub = redis.pubsub()
+        async with redisclient.get_redis() as redis, redis.pubsub() as pubsub:
             await pubsub.subscribe(*self.channels)
             self._listen = True
             while self._listen:
@@ -43,15 +38,100 @@ class PubSub:
     def stop_listening(self):
         self._listen = False
 
+    @staticmethod
+    def user_channel(channel: str, email: str):
+        return f"{channel}:{email}"
+
     async def publish_message(self, message: str):
-        async with self._get_redis() as redis:
+        async with (
+            redisclient.get_redis() as redis,
+            redis.pipeline(transaction=False) as pipe,
+        ):
             encoded_message = message.encode()
-            await asyncio.gather(
-                *[
-                    redis.publish(channel=channel, message=encoded_message)
-                    for channel in self.channels
-                ]
-            )
+            for channel in self.channels:
+                pipe.publish(channel=channel, message=encoded_message)
+            await pipe.execute()
 
     async def close(self):
         await self.close()
+
+
+class PubSubHub:
+    MAX_QUEUED_MESSAGES = 100
+    RECONNECT_DELAY = 1
+
+    def __init__(self):
+        self._queues: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pubsub: RedisPubSub | None = None
+        self._lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+
+    def _get_pubsub(self):
+        loop = asyncio.get_running_loop()
+        # The subscription belongs to the loop that opened it
+        if self._pubsub is None or self._loop is not loop:
+            self._queues.clear()
+            self._loop = loop
+            self._pubsub = redisclient.get_redis().pubsub()
+            self._lock = asyncio.Lock()
+            self._task = None
+        return self._pubsub
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str, email: str):
+        pubsub = self._get_pubsub()
+        user_channel = PubSub.user_channel(channel=channel, email=email)
+        queue = asyncio.Queue(maxsize=self.MAX_QUEUED_MESSAGES)
+        async with self._lock:
+            if not self._queues[user_channel]:
+                await pubsub.subscribe(user_channel)
+            self._queues[user_channel].add(queue)
+            if self._task is None or self._task.done():
+                self._task = self._loop.create_task(self._listen(pubsub))
+        try:
+            yield queue
+        finally:
+            if self._pubsub is pubsub:
+                async with self._lock:
+                    self._queues[user_channel].discard(queue)
+                    if not self._queues[user_channel]:
+                        del self._queues[user_channel]
+                        await pubsub.unsubscribe(user_channel)
+
+    async def _listen(self, pubsub: RedisPubSub):
+        while True:
+            try:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=None
+                )
+            except Exception:
+                logger.exception("PubSub hub lost its subscription, reconnecting")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+                continue
+            if not message:
+                continue
+            channel = message["channel"].decode()
+            for queue in self._queues.get(channel, ()):
+                try:
+                    queue.put_nowait(message["data"].decode())
+                except asyncio.QueueFull:
+                    logger.warning("Dropped message on %s", channel)
+
+    async def close(self):
+        if self._pubsub is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            if self._task is not None:
+                self._task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await self._task
+            await self._pubsub.aclose()
+        self._queues.clear()
+        self._loop = None
+        self._pubsub = None
+        self._lock = None
+        self._task = None
+
+
+hub = PubSubHub()
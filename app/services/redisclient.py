@@ -0,0 +1,62 @@
+import asyncio
+from contextlib import suppress
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.settings import settings
+
+_pool: BlockingConnectionPool | None = None
+_pool_loop: asyncio.AbstractEventLoop | None = None
+_stale_pool_closes: set[asyncio.Task] = set()
+
+
+async def _close_stale_pool(pool: BlockingConnectionPool):
+    # The loop that opened the connections may already be closed
+    with suppress(RuntimeError):
+        await pool.aclose()
+
+
+def get_pool():
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    # Pooled connections belong to the loop that opened them
+    if _pool is None or _pool_loop is not loop:
+        if _pool is not None:
+            task = loop.create_task(_close_stale_pool(_pool))
+            _stale_pool_closes.add(task)
+            task.add_done_callback(_stale_pool_closes.discard)
+        _pool = BlockingConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout,
+        )
+        _pool_loop = loop
+    return _pool
+
+
+def get_redis():
+    return Redis(connection_pool=get_pool())
+
+
+async def close_pool():
+    global _pool, _pool_loop
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
+        _pool_loop = None
+
+
+def get_pool_stats():
+    if _pool is None:
+        return {
+            "max_connections": settings.redis_max_connections,
+            "in_use_connections": 0,
+            "available_connections": 0,
+        }
+    # The pool keeps no public counts, so these fall back to empty if the
+    # attributes move in another redis release
+    return {
+        "max_connections": _pool.max_connections,
+        "in_use_connections": len(getattr(_pool, "_in_use_connections", ())),
+        "available_connections": len(getattr(_pool, "_available_connections", ())),
+    }
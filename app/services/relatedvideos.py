@@ -0,0 +1,42 @@
+import json
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import YoutubeVideo
+from app.services import redisclient
+from app.settings import settings
+
+RELATED_VIDEOS_KEY = "related_videos:{category_id}"
+
+
+async def get_related_video_ids(db_session: AsyncSession, category_id: int):
+    key = RELATED_VIDEOS_KEY.format(category_id=category_id)
+    async with redisclient.get_redis() as redis:
+        if cached := await redis.get(key):
+            return json.loads(cached)
+    # One extra id covers the video the related videos are shown for
+    query = (
+        select(YoutubeVideo.id)
+        .where(YoutubeVideo.category_id == category_id)
+        .order_by(YoutubeVideo.published_at.desc())
+        .limit(settings.youtube_related_videos_cache_size + 1)
+    )
+    video_ids = (await db_session.scalars(query)).all()
+    async with redisclient.get_redis() as redis:
+        await redis.set(
+            key, json.dumps(video_ids), ex=settings.youtube_related_videos_cache_ttl
+        )
+    return video_ids
+
+
+async def invalidate_related_videos(category_ids: list[int]):
+    if not category_ids:
+        return
+    async with redisclient.get_redis() as redis:
+        await redis.delete(
+            *[
+                RELATED_VIDEOS_KEY.format(category_id=category_id)
+                for category_id in category_ids
+            ]
+        )
@@ -1,7 +1,9 @@
 import asyncio
+from typing import BinaryIO
 from urllib.parse import urljoin, urlparse, urlunparse
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 
 from app.settings import settings
@@ -14,6 +16,10 @@ _client = boto3.client(
     aws_secret_access_key=settings.aws_secret_access_key,
     config=Config(s3={"addressing_style": "virtual"}),
 )
+_transfer_config = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+)
 
 
 def resolve_url(filename: str):
@@ -40,6 +46,22 @@ async def upload_file(
     )
 
 
+async def upload_fileobj(
+    filename: str,
+    fileobj: BinaryIO,
+    content_type: str,
+    acl="public-read",
+):
+    return await asyncio.to_thread(
+        _client.upload_fileobj,
+        Fileobj=fileobj,
+        Bucket=settings.aws_s3_bucket,
+        Key=filename,
+        ExtraArgs={"ACL": acl, "ContentType": content_type},
+        Config=_transfer_config,
+    )
+
+
 async def delete_file(filename: str):
     return await asyncio.to_thread(
         _client.delete_object, Bucket=settings.aws_s3_bucket, Key=filename
@@ -14,6 +14,8 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(extra="ignore", env_file=".env")
 
     async_database_url: str
+    auth_user_cache_size: int = 1024
+    auth_user_cache_ttl: int = 10
     aws_access_key_id: str
     aws_endpoint_url: str
     aws_region_name: str
@@ -21,12 +23,32 @@ class Settings(BaseSettings):
     aws_s3_artwork_folder: str
     aws_s3_bucket: str
     aws_s3_music_folder: str
+    credentials_cache_size: int = 256
+    credentials_cache_ttl: int = 300
+    database_max_overflow: int = 10
+    database_pool_recycle: int = 1800
+    database_pool_size: int = 5
+    database_pool_timeout: int = 30
     env: ENV = ENV.DEVELOPMENT
     fernet_key: str
+    google_api_cache_ttl: int = 604800
+    google_api_daily_quota: int = 10000
     google_api_key: str
+    google_api_max_concurrency: int = 10
+    google_api_max_retries: int = 5
+    google_api_quota_backoff: int = 900
+    google_api_rate_limit_burst: int = 100
     invidious_api_url: str
+    jwt_cache_size: int = 1024
+    pagination_count_cache_ttl: int = 60
+    pagination_estimate_threshold: int = 10000
+    password_hash_rounds: int = 12
+    password_hash_workers: int = 4
+    redis_max_connections: int = 50
+    redis_pool_timeout: int = 20
     redis_url: str
     secret_key: str
+    session_ttl: int = 1209600
     smtp_from_email: str = "dripdrop <app@dripdrop.pro>"
     smtp_host: str = "smtp.protonmail.ch"
     smtp_password: str
@@ -41,6 +63,8 @@ class Settings(BaseSettings):
     test_webdav_username: str
     timeout: int = 600
     timezone: tz | None = tz.utc
+    youtube_related_videos_cache_size: int = 50
+    youtube_related_videos_cache_ttl: int = 86400
 
 
 settings = Settings()
@@ -1,31 +1,71 @@
 import asyncio
 import inspect
+import logging
+import os
 from contextlib import asynccontextmanager
 
 from celery import Celery, Task
 from celery.schedules import crontab
-from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from celery.signals import worker_process_init, worker_process_shutdown
+from kombu import Queue
 
+from app.db import checkout_connection, engine, pool_metrics, session_maker
+from app.services import google, redisclient
 from app.settings import ENV, settings
 
+logger = logging.getLogger(__name__)
+
+SLOW_CHECKOUT_SECONDS = 1
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid: int | None = None
+
+
+def get_worker_loop():
+    global _loop, _loop_pid
+    # A loop inherited through fork is unusable in the child process
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        _loop = asyncio.new_event_loop()
+        _loop_pid = os.getpid()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_async(coroutine):
+    return get_worker_loop().run_until_complete(coroutine)
+
+
+def close_worker_loop():
+    global _loop
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        return
+    pending = asyncio.all_tasks(_loop)
+    for task in pending:
+        task.cancel()
+    _loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    _loop.run_until_complete(_loop.shutdown_asyncgens())
+    _loop.run_until_complete(_loop.shutdown_default_executor())
+    _loop.close()
+    _loop = None
+
 
 class QueueTask(Task):
     @asynccontextmanager
     async def db_session(self):
-        engine = create_async_engine(settings.async_database_url)
-        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
-        async with sessionmaker() as session:
+        async with session_maker() as session:
+            wait_time = await checkout_connection(session)
+            if wait_time > SLOW_CHECKOUT_SECONDS:
+                logger.warning(
+                    "Task %s waited %.2fs for a database connection",
+                    self.name,
+                    wait_time,
+                )
             yield session
-        await engine.dispose()
 
     @asynccontextmanager
     async def redis_client(self):
-        redis_client = Redis.from_url(settings.redis_url)
-        try:
+        async with redisclient.get_redis() as redis_client:
             yield redis_client
-        finally:
-            await redis_client.aclose()
 
     def __call__(self, *args, **kwargs):
         if not inspect.iscoroutinefunction(self.run):
@@ -35,8 +75,13 @@ class QueueTask(Task):
             loop = asyncio.get_running_loop()
             return loop.create_task(self.run(*args, **kwargs))
         except RuntimeError:
-            loop = asyncio.new_event_loop()
-            return loop.run_until_complete(self.run(*args, **kwargs))
+            return run_async(self.run(*args, **kwargs))
+
+
+class Queues:
+    INTERACTIVE = "interactive"
+    EMAIL = "email"
+    BULK = "bulk"
 
 
 celery = Celery(
@@ -50,9 +95,44 @@ celery.conf.update(
     result_serializer="json",
     result_backend_always_retry=True,
     result_backend_max_retries=3,
+    task_queues=[
+        Queue(Queues.INTERACTIVE),
+        Queue(Queues.EMAIL),
+        Queue(Queues.BULK),
+    ],
+    task_default_queue=Queues.INTERACTIVE,
+    task_routes={
+        "app.tasks.music.*": {"queue": Queues.INTERACTIVE, "priority": 0},
+        "app.tasks.email.*": {"queue": Queues.EMAIL, "priority": 3},
+        "app.tasks.youtube.*": {"queue": Queues.BULK, "priority": 9},
+    },
+    task_default_priority=5,
+    # Workers consuming several queues drain them in the order given to -Q
+    broker_transport_options={
+        "queue_order_strategy": "priority",
+        "priority_steps": list(range(10)),
+        "sep": ":",
+    },
+    worker_prefetch_multiplier=1,
 )
 
 
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Connections inherited from the parent process must not be shared
+    engine.sync_engine.dispose(close=False)
+    get_worker_loop()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    logger.info("Database pool metrics: %s", pool_metrics.snapshot())
+    run_async(engine.dispose())
+    run_async(google.close_client())
+    run_async(redisclient.close_pool())
+    close_worker_loop()
+
+
 @celery.on_after_configure.connect
 def setup_periodic_tasks(sender: Celery, **kwargs):
     from app.tasks import youtube
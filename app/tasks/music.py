@@ -1,9 +1,9 @@
 import asyncio
+import os
 import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
 
-import aiofiles
 from sqlalchemy import select
 from yt_dlp.utils import sanitize_filename
 
@@ -19,7 +19,7 @@ from app.services import (
 )
 from app.services.pubsub import PubSub
 from app.settings import settings
-from app.tasks.app import QueueTask, celery
+from app.tasks.app import QueueTask, celery, run_async
 
 async def retrieve_audio_file(music_job: MusicJob, cookies: str | None = None):
     job_file_path = Path(
@@ -30,16 +30,13 @@ async def retrieve_audio_file(music_job: MusicJob, cookies: str | None = None):
 
     filename = None
     if music_job.filename_url:
-        async with httpclient.AsyncClient() as client:
-            response = await client.get(music_job.filename_url)
-            audio_file_path = job_file_path.joinpath(
-                f"temp{Path(music_job.original_filename).suffix}"
-            )
-
-            async with aiofiles.open(audio_file_path, mode="wb") as f:
-                await f.write(response.content)
-
-            filename = await ffmpeg.convert_audio_to_mp3(audio_file=audio_file_path)
+        audio_file_path = job_file_path.joinpath(
+            f"temp{Path(music_job.original_filename).suffix}"
+        )
+        await httpclient.download_file(
+            url=music_job.filename_url, file_path=audio_file_path
+        )
+        filename = await ffmpeg.convert_audio_to_mp3(audio_file=audio_file_path)
     elif music_job.video_url:
         # NOTE: Invidious doesn't work atm
         # if "youtube.com" in music_job.video_url:
@@ -84,11 +81,21 @@ async def get_artwork_info(music_job: MusicJob):
         return None
 
 
+def _music_job_pubsub(music_job: MusicJob):
+    return PubSub(
+        channels=[
+            PubSub.user_channel(
+                channel=PubSub.Channels.MUSIC_JOB_UPDATE, email=music_job.user_email
+            )
+        ]
+    )
+
+
 async def on_failed_music_job(self: QueueTask, exc, task_id, args, kwargs, einfo):
     music_job_id = kwargs.get("music_job_id")
-    pubsub = PubSub(channels=[PubSub.Channels.MUSIC_JOB_UPDATE])
     async with self.db_session() as db_session:
         music_job = await db_session.get_one(MusicJob, music_job_id)
+        pubsub = _music_job_pubsub(music_job=music_job)
         music_job.failed = datetime.now(timezone.utc)
         await db_session.commit()
         await pubsub.publish_message(
@@ -100,28 +107,30 @@ async def on_failed_music_job(self: QueueTask, exc, task_id, args, kwargs, einfo
 
 @celery.task(
     bind=True,
-    on_failure=lambda *args, **kwargs: asyncio.run(
+    on_failure=lambda *args, **kwargs: run_async(
         on_failed_music_job(*args, **kwargs)
     ),
 )
 async def run_music_job(
     self: QueueTask, music_job_id: str, upload_to_webdav: bool = False
 ):
-    pubsub = PubSub(channels=[PubSub.Channels.MUSIC_JOB_UPDATE])
     async with self.db_session() as db_session:
         music_job = await db_session.get_one(MusicJob, music_job_id)
+        pubsub = _music_job_pubsub(music_job=music_job)
         await pubsub.publish_message(
             MusicJobUpdateResponse(id=music_job_id, status="STARTED").model_dump_json()
         )
 
-        query = select(Cookies).where(Cookies.email == music_job.user_email)
-        stored_cookies = await db_session.scalar(query)
+        # Cookies are only passed to downloads, so uploaded files never
+        # decrypt them
+        cookies = None
+        if music_job.video_url:
+            query = select(Cookies).where(Cookies.email == music_job.user_email)
+            if stored_cookies := await db_session.scalar(query):
+                cookies = stored_cookies.content
 
         if not (
-            filename := await retrieve_audio_file(
-                music_job=music_job,
-                cookies=stored_cookies.content if stored_cookies else None,
-            )
+            filename := await retrieve_audio_file(music_job=music_job, cookies=cookies)
         ):
             raise Exception("File not found")
 
@@ -150,18 +159,19 @@ async def run_music_job(
         query = select(WebDav).where(WebDav.email == music_job.user_email)
         webdav = await db_session.scalar(query)
 
-        async with aiofiles.open(filename, mode="rb") as f:
-            file_content = await f.read()
-            await s3.upload_file(
+        with open(filename, mode="rb") as f:
+            await s3.upload_fileobj(
                 filename=new_filepath,
-                body=file_content,
+                fileobj=f,
                 content_type="audio/mpeg",
             )
             if webdav and upload_to_webdav:
+                await asyncio.to_thread(f.seek, 0)
                 async with httpclient.AsyncClient() as client:
                     response = await client.put(
                         f"{webdav.url}/{new_filename}",
-                        content=file_content,
+                        content=httpclient.iter_file(f),
+                        headers={"Content-Length": str(os.path.getsize(filename))},
                         auth=(webdav.username, webdav.password),
                     )
                     response.raise_for_status()
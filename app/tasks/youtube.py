@@ -1,24 +1,163 @@
 import asyncio
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 
 import dateutil.parser
-from sqlalchemy import and_, delete, false, select
+from redis.asyncio import Redis
+from sqlalchemy import case, false, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import joinedload
 
 from app.db import (
     User,
     YoutubeChannel,
-    YoutubeNewSubscription,
+    YoutubeFeedVideo,
     YoutubeSubscription,
     YoutubeUserChannel,
     YoutubeVideo,
     YoutubeVideoCategory,
 )
 from app.models.youtube import YoutubeChannelUpdateResponse
-from app.services import google
+from app.services import google, relatedvideos
+from app.services.counts import CountScope, invalidate_counts
 from app.services.pubsub import PubSub
 from app.tasks.app import QueueTask, celery
 
+CHANNEL_VIDEOS_KEY = "channel_videos:{channel_id}"
+CHANNEL_VIDEOS_METRICS_KEY = "channel_videos:metrics"
+# A queued claim has to outlive the wait for a worker, or a later request
+# would enqueue a duplicate crawl. It is not refreshed by skipped requests, so
+# a task lost from the queue only blocks the channel until it lapses.
+CHANNEL_VIDEOS_PENDING_TTL = 21600
+# Refreshed on every page, so a running claim only lapses when a worker dies
+# mid crawl
+CHANNEL_VIDEOS_RUNNING_TTL = 900
+
+# An empty date after crawls back to the first known page, which makes it the
+# widest request. Dates are ISO formatted, so they compare as strings.
+_MERGE_CHANNEL_VIDEOS = """
+local date_after = redis.call("HGET", KEYS[1], "date_after")
+if ARGV[1] == "" or (date_after ~= "" and ARGV[1] < date_after) then
+    redis.call("HSET", KEYS[1], "date_after", ARGV[1])
+end
+if ARGV[2] == "1" then
+    redis.call("HSET", KEYS[1], "full_backfill", "1")
+end
+"""
+
+_REQUEST_CHANNEL_VIDEOS = f"""
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    redis.call(
+        "HSET", KEYS[1], "state", "pending", "date_after", ARGV[1],
+        "full_backfill", ARGV[2], "requests", 0
+    )
+    redis.call("EXPIRE", KEYS[1], ARGV[3])
+    redis.call("HINCRBY", KEYS[2], "enqueued", 1)
+    return 1
+end
+{_MERGE_CHANNEL_VIDEOS}
+redis.call("HINCRBY", KEYS[1], "requests", 1)
+if redis.call("HGET", KEYS[1], "state") == "running" then
+    redis.call("HINCRBY", KEYS[2], "absorbed", 1)
+else
+    redis.call("HINCRBY", KEYS[2], "coalesced", 1)
+end
+return 0
+"""
+
+_CLAIM_CHANNEL_VIDEOS = f"""
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    redis.call(
+        "HSET", KEYS[1], "date_after", ARGV[1], "full_backfill", ARGV[2],
+        "requests", 0
+    )
+elseif redis.call("HGET", KEYS[1], "state") == "running" then
+    {_MERGE_CHANNEL_VIDEOS}
+    redis.call("HINCRBY", KEYS[1], "requests", 1)
+    redis.call("HINCRBY", KEYS[2], "absorbed", 1)
+    return false
+else
+    {_MERGE_CHANNEL_VIDEOS}
+end
+redis.call("HSET", KEYS[1], "state", "running")
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+return redis.call("HMGET", KEYS[1], "date_after", "full_backfill", "requests")
+"""
+
+# Requests absorbed after the crawl last looked at them get a follow up run
+_RELEASE_CHANNEL_VIDEOS = """
+local requests = redis.call("HGET", KEYS[1], "requests")
+if not requests or tonumber(requests) <= tonumber(ARGV[1]) then
+    redis.call("DEL", KEYS[1])
+    return false
+end
+redis.call("HSET", KEYS[1], "state", "pending")
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+return redis.call("HMGET", KEYS[1], "date_after", "full_backfill")
+"""
+
+
+def _parse_date_after(date_after: date | str | None):
+    if isinstance(date_after, str):
+        return dateutil.parser.parse(date_after).date()
+    return date_after
+
+
+def _encode_channel_videos_request(date_after: date | None, full_backfill: bool):
+    return date_after.isoformat() if date_after else "", "1" if full_backfill else "0"
+
+
+def _decode_channel_videos_request(date_after: bytes, full_backfill: bytes):
+    return (
+        date.fromisoformat(date_after.decode()) if date_after else None,
+        full_backfill == b"1",
+    )
+
+
+async def _enqueue_channel_videos(
+    channel_id: str, date_after: date | None, full_backfill: bool
+):
+    kwargs = {"channel_id": channel_id, "date_after": date_after}
+    if full_backfill:
+        kwargs["full_backfill"] = True
+    await asyncio.to_thread(add_channel_videos.delay, **kwargs)
+
+
+async def request_channel_videos(
+    channel_id: str,
+    date_after: date | str | None = None,
+    full_backfill: bool = False,
+):
+    date_after = _parse_date_after(date_after)
+    key = CHANNEL_VIDEOS_KEY.format(channel_id=channel_id)
+    async with add_channel_videos.redis_client() as redis:
+        enqueue = await redis.eval(
+            _REQUEST_CHANNEL_VIDEOS,
+            2,
+            key,
+            CHANNEL_VIDEOS_METRICS_KEY,
+            *_encode_channel_videos_request(date_after, full_backfill),
+            CHANNEL_VIDEOS_PENDING_TTL,
+        )
+        if not enqueue:
+            return False
+        try:
+            await _enqueue_channel_videos(channel_id, date_after, full_backfill)
+        except Exception:
+            await redis.delete(key)
+            raise
+    return True
+
+
+async def get_channel_videos_metrics():
+    async with add_channel_videos.redis_client() as redis:
+        metrics = await redis.hgetall(CHANNEL_VIDEOS_METRICS_KEY)
+    return {
+        field: int(metrics.get(field.encode(), 0))
+        for field in ("enqueued", "coalesced", "absorbed")
+    }
+
 
 @celery.task(bind=True)
 async def update_user_subscriptions(self: QueueTask, email: str):
@@ -27,89 +166,205 @@ async def update_user_subscriptions(self: QueueTask, email: str):
         if not (user_channel := await db_session.scalar(query)):
             return
 
-        async for subscribed_channels in google.get_channel_subscriptions(
+        subscribed_channels: dict[str, google.YoutubeChannelInfo] = {}
+        async for channels in google.get_channel_subscriptions(
             channel_id=user_channel.id
         ):
-            for subscribed_channel in subscribed_channels:
-                query = select(YoutubeChannel).where(
-                    YoutubeChannel.id == subscribed_channel.id
-                )
-                if channel := await db_session.scalar(query):
-                    channel.title = subscribed_channel.title
-                    channel.thumbnail = subscribed_channel.thumbnail
-                else:
-                    channel = YoutubeChannel(
-                        id=subscribed_channel.id,
-                        title=subscribed_channel.title,
-                        thumbnail=subscribed_channel.thumbnail,
-                        last_videos_updated=datetime.now(timezone.utc),
-                    )
-                    db_session.add(channel)
-                    await db_session.commit()
-                    await asyncio.to_thread(
-                        add_channel_videos.delay, channel_id=channel.id
-                    )
-                query = select(YoutubeSubscription).where(
-                    YoutubeSubscription.channel_id == channel.id,
-                    YoutubeSubscription.email == email,
-                )
-                if not (subscription := await db_session.scalar(query)):
-                    db_session.add(
-                        YoutubeSubscription(email=email, channel_id=channel.id)
-                    )
-                else:
-                    if not subscription.user_submitted:
-                        subscription.deleted_at = None
+            for channel in channels:
+                subscribed_channels[channel.id] = channel
+        channel_ids = list(subscribed_channels.keys())
 
-                query = select(YoutubeNewSubscription).where(
-                    YoutubeNewSubscription.channel_id == subscribed_channel.id,
-                    YoutubeNewSubscription.email == email,
-                )
-                new_subscription = await db_session.scalar(query)
-                if not new_subscription:
-                    db_session.add(
-                        YoutubeNewSubscription(
-                            channel_id=subscribed_channel.id, email=email
-                        )
-                    )
-                await db_session.commit()
+        query = select(YoutubeSubscription.channel_id).where(
+            YoutubeSubscription.email == email,
+            YoutubeSubscription.deleted_at.is_(None),
+        )
+        active_channel_ids = set((await db_session.scalars(query)).all())
 
-        query = (
-            select(YoutubeSubscription)
-            .join(
-                YoutubeNewSubscription,
-                and_(
-                    YoutubeNewSubscription.channel_id == YoutubeSubscription.channel_id,
-                    YoutubeNewSubscription.email == YoutubeSubscription.email,
-                ),
-                isouter=True,
+        new_channel_ids = []
+        if channel_ids:
+            query = select(YoutubeChannel.id).where(YoutubeChannel.id.in_(channel_ids))
+            existing_channel_ids = set((await db_session.scalars(query)).all())
+            new_channel_ids = [
+                channel_id
+                for channel_id in channel_ids
+                if channel_id not in existing_channel_ids
+            ]
+
+            current_time = datetime.now(timezone.utc)
+            statement = insert(YoutubeChannel).values(
+                [
+                    {
+                        "id": channel.id,
+                        "title": channel.title,
+                        "thumbnail": channel.thumbnail,
+                        "last_videos_updated": current_time,
+                    }
+                    for channel in subscribed_channels.values()
+                ]
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[YoutubeChannel.id],
+                set_={
+                    "title": statement.excluded.title,
+                    "thumbnail": statement.excluded.thumbnail,
+                    "modified_at": current_time,
+                },
+            )
+            await db_session.execute(statement)
+
+            # User submitted subscriptions are left as the user set them
+            statement = insert(YoutubeSubscription).values(
+                [
+                    {"email": email, "channel_id": channel_id}
+                    for channel_id in channel_ids
+                ]
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[
+                    YoutubeSubscription.channel_id,
+                    YoutubeSubscription.email,
+                ],
+                set_={"deleted_at": None, "modified_at": current_time},
+                where=YoutubeSubscription.user_submitted == false(),
+            )
+            await db_session.execute(statement)
+            await YoutubeFeedVideo.add_subscriptions(
+                db_session,
+                email=email,
+                channel_ids=[
+                    channel_id
+                    for channel_id in channel_ids
+                    if channel_id not in active_channel_ids
+                ],
             )
+
+        query = (
+            update(YoutubeSubscription)
             .where(
-                YoutubeSubscription.email == user_channel.email,
+                YoutubeSubscription.email == email,
                 YoutubeSubscription.deleted_at.is_(None),
                 YoutubeSubscription.user_submitted == false(),
-                YoutubeNewSubscription.channel_id.is_(None),
+                YoutubeSubscription.channel_id.not_in(channel_ids),
             )
+            .values(deleted_at=datetime.now(timezone.utc))
+            .returning(YoutubeSubscription.channel_id)
         )
-        subscriptions = await db_session.scalars(query)
-        for subscription in subscriptions:
-            await db_session.delete(subscription)
-        query = delete(YoutubeNewSubscription).where(
-            YoutubeNewSubscription.email == email
-        )
-        await db_session.execute(query)
+        deleted_channel_ids = (await db_session.scalars(query)).all()
+        if deleted_channel_ids:
+            await YoutubeFeedVideo.remove_subscriptions(
+                db_session, email=email, channel_ids=deleted_channel_ids
+            )
         await db_session.commit()
+        await invalidate_counts(
+            email=email, scopes=[CountScope.SUBSCRIPTIONS, CountScope.VIDEOS]
+        )
+
+        for channel_id in new_channel_ids:
+            await request_channel_videos(channel_id=channel_id)
+
+
+def _upsert_videos_statement(videos: list[dict]):
+    statement = insert(YoutubeVideo).values(videos)
+    # Only move the published date when the title or thumbnail changed
+    changed = or_(
+        YoutubeVideo.title != statement.excluded.title,
+        YoutubeVideo.thumbnail != statement.excluded.thumbnail,
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[YoutubeVideo.id],
+        set_={
+            "title": statement.excluded.title,
+            "thumbnail": statement.excluded.thumbnail,
+            "description": statement.excluded.description,
+            "published_at": case(
+                (changed, statement.excluded.published_at),
+                else_=YoutubeVideo.published_at,
+            ),
+            "modified_at": datetime.now(timezone.utc),
+        },
+    )
+
+
+@dataclass
+class _ChannelVideosRun:
+    redis: Redis
+    key: str
+    date_after: date | None
+    full_backfill: bool
+    seen_requests: int
+
+    async def refresh(self):
+        async with self.redis.pipeline() as pipe:
+            pipe.expire(self.key, CHANNEL_VIDEOS_RUNNING_TTL)
+            pipe.hmget(self.key, "date_after", "full_backfill", "requests")
+            _, (date_after, full_backfill, requests) = await pipe.execute()
+        if requests is None:
+            return
+        date_after, full_backfill = _decode_channel_videos_request(
+            date_after, full_backfill
+        )
+        self.date_after = date_after
+        # A backfill asked for mid crawl still needs a run of its own
+        if full_backfill == self.full_backfill:
+            self.seen_requests = int(requests)
+
+
+@asynccontextmanager
+async def _claim_channel_videos(
+    redis: Redis, channel_id: str, date_after: date | None, full_backfill: bool
+):
+    key = CHANNEL_VIDEOS_KEY.format(channel_id=channel_id)
+    claimed = await redis.eval(
+        _CLAIM_CHANNEL_VIDEOS,
+        2,
+        key,
+        CHANNEL_VIDEOS_METRICS_KEY,
+        *_encode_channel_videos_request(date_after, full_backfill),
+        CHANNEL_VIDEOS_RUNNING_TTL,
+    )
+    if not claimed:
+        yield None
+        return
+    run = _ChannelVideosRun(
+        redis,
+        key,
+        *_decode_channel_videos_request(*claimed[:2]),
+        seen_requests=int(claimed[2]),
+    )
+    try:
+        yield run
+    finally:
+        if request := await redis.eval(
+            _RELEASE_CHANNEL_VIDEOS,
+            1,
+            key,
+            run.seen_requests,
+            CHANNEL_VIDEOS_PENDING_TTL,
+        ):
+            await _enqueue_channel_videos(
+                channel_id, *_decode_channel_videos_request(*request)
+            )
 
 
 @celery.task(bind=True)
 async def add_channel_videos(
     self: QueueTask,
     channel_id: str,
-    date_after: date | None = None,
+    date_after: date | str | None = None,
+    full_backfill: bool = False,
 ):
-    pubsub = PubSub(channels=[PubSub.Channels.YOUTUBE_CHANNEL_UPDATE])
+    async with (
+        self.redis_client() as redis,
+        _claim_channel_videos(
+            redis, channel_id, _parse_date_after(date_after), full_backfill
+        ) as run,
+        self.db_session() as db_session,
+    ):
+        # Another run already owns this channel and absorbed the request
+        if not run:
+            return
+        date_after, full_backfill = run.date_after, run.full_backfill
 
-    async with self.db_session() as db_session:
         query = select(YoutubeChannel).where(YoutubeChannel.id == channel_id)
         channel = await db_session.scalar(query)
         if not channel:
@@ -118,60 +373,109 @@ async def add_channel_videos(
         channel.updating = True
         await db_session.commit()
 
+        query = select(YoutubeSubscription.email).where(
+            YoutubeSubscription.channel_id == channel_id,
+            YoutubeSubscription.deleted_at.is_(None),
+        )
+        pubsub = PubSub(
+            channels=[
+                PubSub.user_channel(
+                    channel=PubSub.Channels.YOUTUBE_CHANNEL_UPDATE, email=email
+                )
+                for email in await db_session.scalars(query)
+            ]
+        )
+
         await pubsub.publish_message(
             message=YoutubeChannelUpdateResponse(
                 id=channel.id, updating=True
             ).model_dump_json()
         )
 
-        async for videos in google.get_channel_latest_videos(channel_id=channel_id):
-            end_update = False
-            for video in videos:
-                video_upload_date = dateutil.parser.parse(video.published)
-                if date_after and video_upload_date.date() < date_after:
-                    end_update = True
-                    break
-
-                query = select(YoutubeVideo).where(YoutubeVideo.id == video.id)
-                existing_video = await db_session.scalar(query)
-
-                if existing_video:
-                    if [existing_video.title, existing_video.thumbnail] != [
-                        video.title,
-                        video.thumbnail,
-                    ]:
-                        existing_video.published_at = video_upload_date
-                    existing_video.title = video.title
-                    existing_video.thumbnail = video.thumbnail
-                    existing_video.description = video.description
-                else:
-                    db_session.add(
-                        YoutubeVideo(
-                            id=video.id,
-                            title=video.title,
-                            thumbnail=video.thumbnail,
-                            channel_id=channel_id,
-                            category_id=video.category_id,
-                            description=video.description,
-                            published_at=video_upload_date,
+        # Stopping at already seen pages is only safe once a crawl has walked
+        # the whole playlist, otherwise older videos a failed crawl never
+        # reached would be skipped for good
+        incremental = channel.videos_backfilled and not full_backfill
+        playlist_walked = False
+        try:
+            # Unchanged pages end a crawl, so they are only marked as seen once
+            # the crawl has stored their videos
+            etags = google.DeferredETags()
+            async with aclosing(
+                google.get_channel_latest_videos(
+                    channel_id=channel_id, conditional=incremental, etags=etags
+                )
+            ) as channel_videos:
+                async for videos in channel_videos:
+                    # Requests made during the crawl can widen the date after
+                    await run.refresh()
+                    date_after = run.date_after
+                    end_update = False
+                    new_videos = {}
+                    for video in videos:
+                        video_upload_date = dateutil.parser.parse(video.published)
+                        if date_after and video_upload_date.date() < date_after:
+                            end_update = True
+                            break
+                        new_videos[video.id] = {
+                            "id": video.id,
+                            "title": video.title,
+                            "thumbnail": video.thumbnail,
+                            "channel_id": channel_id,
+                            "category_id": video.category_id,
+                            "description": video.description,
+                            "published_at": video_upload_date,
+                        }
+                    if new_videos:
+                        # Uploads are newest first, so a page of known videos
+                        # means the rest of the playlist was already crawled
+                        if incremental:
+                            query = (
+                                select(func.count())
+                                .select_from(YoutubeVideo)
+                                .where(YoutubeVideo.id.in_(new_videos.keys()))
+                            )
+                            known_videos = await db_session.scalar(query)
+                            end_update = end_update or known_videos == len(new_videos)
+                        await db_session.execute(
+                            _upsert_videos_statement(videos=list(new_videos.values()))
                         )
-                    )
-                await db_session.commit()
-            if end_update:
-                break
-
-        await pubsub.publish_message(
-            message=YoutubeChannelUpdateResponse(
-                id=channel.id, updating=False
-            ).model_dump_json()
-        )
-        channel.updating = False
-        channel.last_videos_updated = datetime.now(timezone.utc)
-        await db_session.commit()
+                        await YoutubeFeedVideo.add_videos(
+                            db_session, video_ids=list(new_videos.keys())
+                        )
+                        await db_session.commit()
+                        await relatedvideos.invalidate_related_videos(
+                            category_ids=list(
+                                {video["category_id"] for video in new_videos.values()}
+                            )
+                        )
+                    if end_update:
+                        break
+                else:
+                    playlist_walked = True
+            await etags.save()
+        except BaseException:
+            await db_session.rollback()
+            raise
+        else:
+            channel.last_videos_updated = datetime.now(timezone.utc)
+            if playlist_walked:
+                channel.videos_backfilled = True
+        finally:
+            # A failed crawl must not leave the channel showing as updating
+            channel.updating = False
+            await db_session.commit()
+            await pubsub.publish_message(
+                message=YoutubeChannelUpdateResponse(
+                    id=channel_id, updating=False
+                ).model_dump_json()
+            )
 
 
 @celery.task(bind=True)
-async def update_channel_videos(self: QueueTask, date_after: date | None = None):
+async def update_channel_videos(
+    self: QueueTask, date_after: date | None = None, full_backfill: bool = False
+):
     async with self.db_session() as db_session:
         query = (
             select(YoutubeSubscription)
@@ -187,10 +491,10 @@ async def update_channel_videos(self: QueueTask, date_after: date | None = None)
                     datetime.now(timezone.utc) - timedelta(days=1),
                     channel.last_videos_updated,
                 ).date()
-            await asyncio.to_thread(
-                add_channel_videos.delay,
+            await request_channel_videos(
                 channel_id=subscription.channel_id,
                 date_after=date_after,
+                full_backfill=full_backfill,
             )
 
 
@@ -1,9 +1,18 @@
+import base64
+import json
 import math
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Generic, TypeVar
 
-from sqlalchemy import Select, func, select
+from fastapi import HTTPException, status
+from sqlalchemy import ClauseElement, Executable, Select, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.services.counts import CountCache
+from app.settings import settings
 
 T = TypeVar("T")
 
@@ -11,17 +20,134 @@ T = TypeVar("T")
 @dataclass
 class PaginatedResults(Generic[T]):
     results: T
-    total_pages: int
+    total_pages: int | None
+    next_cursor: str | None = None
+
+
+@dataclass
+class Keyset:
+    # The last column must be unique so that every row has a distinct key
+    columns: list[InstrumentedAttribute]
+    descending: bool = True
+
+
+def encode_cursor(values: list):
+    values = [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, keyset: Keyset):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keyset.columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value)
+            if column.type.python_type is datetime
+            else column.type.python_type(value)
+            for column, value in zip(keyset.columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            detail="Invalid cursor.", status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kwargs):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kwargs)
+
+
+async def count_results(db_session: AsyncSession, query: Select, estimate=False):
+    connection = await db_session.connection()
+    if estimate and connection.dialect.name == "postgresql":
+        plan = await db_session.scalar(Explain(query))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        rows = plan[0]["Plan"]["Plan Rows"]
+        # Planner estimates are too rough to replace small exact counts
+        if rows >= settings.pagination_estimate_threshold:
+            return rows
+    count_query = select(func.count("*")).select_from(query.subquery())
+    return await db_session.scalar(count_query)
+
+
+def keyset_query(query: Select[T], keyset: Keyset, cursor: str | None = None):
+    # Keyset columns are selected after the query's own so the cursor can be
+    # read from the end of each row
+    items_query = query.add_columns(
+        *[column.label(f"keyset_{i}") for i, column in enumerate(keyset.columns)]
+    ).order_by(
+        *[
+            column.desc() if keyset.descending else column.asc()
+            for column in keyset.columns
+        ]
+    )
+    if cursor:
+        key = tuple_(*keyset.columns)
+        values = tuple(decode_cursor(cursor=cursor, keyset=keyset))
+        items_query = items_query.where(
+            key < values if keyset.descending else key > values
+        )
+    return items_query
 
 
 async def query_with_pagination(
-    db_session: AsyncSession, query: Select[T], page: int, per_page: int
+    db_session: AsyncSession,
+    query: Select[T],
+    page: int,
+    per_page: int,
+    keyset: Keyset | None = None,
+    cursor: str | None = None,
+    include_total: bool = True,
+    count_cache: CountCache | None = None,
+    estimate_total: bool = False,
 ):
-    items_query = query.offset((page - 1) * per_page).limit(per_page)
-    count_query = select(func.count("*")).select_from(query.subquery())
+    total_pages = None
+    if include_total or not keyset:
+
+        async def count_rows():
+            return await count_results(
+                db_session=db_session, query=query, estimate=estimate_total
+            )
+
+        if count_cache:
+            count = await count_cache.count(count=count_rows, estimate=estimate_total)
+        else:
+            count = await count_rows()
+        total_pages = math.ceil(count / per_page)
+
+    # Single entity queries give entities, column projections give rows
+    width = len(query.column_descriptions)
+    if not keyset:
+        items_query = query.offset((page - 1) * per_page).limit(per_page)
+        if width == 1:
+            items = await db_session.scalars(items_query)
+        else:
+            items = (await db_session.execute(items_query)).all()
+        return PaginatedResults[T](results=items, total_pages=total_pages)
 
-    items = await db_session.scalars(items_query)
-    count = await db_session.scalar(count_query)
-    total_pages = math.ceil(count / per_page)
+    items_query = keyset_query(query=query, keyset=keyset, cursor=cursor)
+    if not cursor:
+        items_query = items_query.offset((page - 1) * per_page)
+    # One extra row tells whether there is a next page without counting
+    rows = (await db_session.execute(items_query.limit(per_page + 1))).all()
 
-    return PaginatedResults[T](results=items, total_pages=total_pages)
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(values=list(rows[-1][width:]))
+    return PaginatedResults[T](
+        results=[row[0] if width == 1 else row for row in rows],
+        total_pages=total_pages,
+        next_cursor=next_cursor,
+    )
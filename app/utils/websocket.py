@@ -0,0 +1,17 @@
+import asyncio
+from contextlib import suppress
+
+from fastapi import WebSocket
+
+from app.services.pubsub import hub
+
+PING_INTERVAL = 60
+
+
+async def listen_updates(websocket: WebSocket, channel: str, email: str):
+    async with hub.subscribe(channel=channel, email=email) as messages:
+        while True:
+            with suppress(TimeoutError):
+                message = await asyncio.wait_for(messages.get(), PING_INTERVAL)
+                await websocket.send_text(message)
+            await websocket.send_json({"status": "PING"})
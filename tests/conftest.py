@@ -16,13 +16,16 @@ from app.db import (
     WebDav,
     Cookies,
     YoutubeChannel,
+    YoutubeFeedVideo,
     YoutubeSubscription,
     YoutubeVideo,
     YoutubeVideoCategory,
     engine,
     session_maker,
 )
-from app.services import httpclient, s3
+from app.db.models.encrypted import credentials_cache
+from app.dependencies import user_cache
+from app.services import httpclient, passwords, s3
 from app.services.pubsub import PubSub
 from app.settings import ENV, settings
 
@@ -73,6 +76,15 @@ async def redis():
     await redis.aclose()
 
 
+@pytest.fixture(scope="function", autouse=True)
+async def clear_user_cache():
+    user_cache.clear()
+    credentials_cache.clear()
+    yield
+    user_cache.clear()
+    credentials_cache.clear()
+
+
 @pytest.fixture(scope="function")
 async def get_pubsub_channel_messages():
     async def _run(channel: str, max_num_messages: int, timeout: int = 60):
@@ -106,7 +118,7 @@ async def create_user(db_session: AsyncSession, faker: Faker):
     ):
         new_user = User(
             email=email or faker.email(),
-            password=password or faker.password(),
+            password=await passwords.hash_password(password or faker.password()),
             admin=admin,
             verified=verified,
         )
@@ -247,6 +259,9 @@ async def create_youtube_subscription(
             deleted_at=faker.date_time(tzinfo=timezone.utc) if deleted else None,
         )
         db_session.add(subscription)
+        await YoutubeFeedVideo.add_subscriptions(
+            db_session, email=email, channel_ids=[channel_id]
+        )
         await db_session.commit()
         return subscription
 
@@ -295,6 +310,7 @@ async def create_youtube_video(
             published_at=published_at or faker.date_time(tzinfo=timezone.utc),
         )
         db_session.add(video)
+        await YoutubeFeedVideo.add_videos(db_session, video_ids=[video.id])
         await db_session.commit()
         return video
 
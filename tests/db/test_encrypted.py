@@ -0,0 +1,56 @@
+from sqlalchemy import select
+
+from app.db import User, WebDav
+from app.db.models import encrypted
+from app.db.models.encrypted import credentials_cache
+
+
+async def test_load_without_decrypting(
+    create_user, create_webdav, db_session, monkeypatch
+):
+    """
+    Test loading webdav credentials without reading them. Nothing should be
+    decrypted until a credential is accessed, and it should only be decrypted
+    once while cached.
+    """
+
+    user: User = await create_user()
+    created_webdav: WebDav = await create_webdav(email=user.email)
+    username = created_webdav.username
+    db_session.expunge_all()
+    credentials_cache.clear()
+
+    decrypted = []
+    decrypt = encrypted.fernet.decrypt
+
+    def _decrypt(token):
+        decrypted.append(token)
+        return decrypt(token)
+
+    monkeypatch.setattr(encrypted.fernet, "decrypt", _decrypt)
+    query = select(WebDav).where(WebDav.email == user.email)
+    webdav = await db_session.scalar(query)
+    assert webdav.url == created_webdav.url
+    assert decrypted == []
+
+    assert webdav.username == username
+    assert webdav.username == username
+    assert len(decrypted) == 1
+
+
+async def test_update_with_unchanged_value(create_user, create_webdav):
+    """
+    Test assigning a credential its current value. The credential should not
+    be encrypted again.
+    """
+
+    user: User = await create_user()
+    webdav: WebDav = await create_webdav(email=user.email)
+    encrypted_username = webdav.encrypted_username
+
+    webdav.username = webdav.username
+    assert webdav.encrypted_username == encrypted_username
+
+    webdav.username = webdav.username + "new"
+    assert webdav.encrypted_username != encrypted_username
+    assert WebDav.decrypt_value(webdav.encrypted_username) == webdav.username
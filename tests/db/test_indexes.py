@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from sqlalchemy import select, text
+
+from app.db import MusicJob, YoutubeSubscription
+from app.models.youtube import GetVideos
+from app.routes.youtube.videos import _related_videos_query, _video_list_query
+from app.utils.database import Explain, keyset_query
+
+EMAIL = "user@example.com"
+
+
+def _video_list(**params):
+    # Pages fetch one row more than they return
+    query_params = GetVideos(per_page=50, **params)
+    query, keyset = _video_list_query(email=EMAIL, query_params=query_params)
+    return keyset_query(query=query, keyset=keyset).limit(query_params.per_page + 1)
+
+
+def _index_names(plan: dict):
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from _index_names(child)
+
+
+@pytest.mark.parametrize(
+    "query,index_name",
+    [
+        (
+            _video_list(channel_id="channel"),
+            "youtube_videos_channel_id_published_at_idx",
+        ),
+        (
+            _related_videos_query(
+                email=EMAIL, video_id="video", category_id=1, limit=5
+            ),
+            "youtube_videos_category_id_published_at_idx",
+        ),
+        (
+            select(YoutubeSubscription).where(
+                YoutubeSubscription.email == EMAIL,
+                YoutubeSubscription.deleted_at.is_(None),
+            ),
+            "youtube_subscriptions_email_deleted_at_idx",
+        ),
+        (
+            select(MusicJob)
+            .where(
+                MusicJob.user_email == EMAIL,
+                MusicJob.deleted_at.is_(None),
+            )
+            .order_by(MusicJob.created_at.desc(), MusicJob.id.desc())
+            .limit(50),
+            "music_jobs_user_email_deleted_at_created_at_idx",
+        ),
+        (
+            _video_list(liked_only=True),
+            "youtube_video_likes_email_created_at_idx",
+        ),
+        (
+            _video_list(queued_only=True),
+            "youtube_video_queues_email_created_at_idx",
+        ),
+        (
+            _video_list(),
+            "youtube_feed_videos_email_published_at_idx",
+        ),
+    ],
+)
+async def test_hot_query_uses_index(db_session, query, index_name):
+    """
+    Test the query plan of a hot query, built the same way as its route
+    builds it. It should scan the index that was added for it.
+    """
+
+    # Small test tables are cheaper to scan sequentially
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = await db_session.scalar(Explain(query))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    assert index_name in _index_names(plan[0]["Plan"])
@@ -0,0 +1,116 @@
+import timeit
+from collections import namedtuple
+from datetime import timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models.youtube import YoutubeVideoResponse, YoutubeVideosResponse
+from app.routes.youtube.videos import _video_response
+
+PAGE_SIZE = 50
+ITERATIONS = 200
+
+VideoRow = namedtuple(
+    "VideoRow",
+    [
+        "id",
+        "title",
+        "thumbnail",
+        "published_at",
+        "description",
+        "category_id",
+        "category_name",
+        "channel_id",
+        "channel_title",
+        "channel_thumbnail",
+        "watched",
+        "liked",
+        "queued",
+    ],
+)
+
+
+def _video_rows(faker):
+    return [
+        VideoRow(
+            id=faker.uuid4(),
+            title=faker.sentence(),
+            thumbnail=faker.image_url(),
+            published_at=faker.date_time(tzinfo=timezone.utc),
+            description=faker.paragraph(nb_sentences=20),
+            category_id=faker.random_int(),
+            category_name=faker.word(),
+            channel_id=faker.uuid4(),
+            channel_title=faker.word(),
+            channel_thumbnail=faker.image_url(),
+            watched=faker.date_time(tzinfo=timezone.utc),
+            liked=None,
+            queued=faker.date_time(tzinfo=timezone.utc),
+        )
+        for _ in range(PAGE_SIZE)
+    ]
+
+
+def _validated_page(rows: list[VideoRow]):
+    videos = []
+    for row in rows:
+        video = SimpleNamespace(
+            **row._asdict(),
+            category=SimpleNamespace(id=row.category_id, name=row.category_name),
+            channel=SimpleNamespace(
+                id=row.channel_id,
+                title=row.channel_title,
+                thumbnail=row.channel_thumbnail,
+            ),
+        )
+        video_result = YoutubeVideoResponse.model_validate(video)
+        video_result.watched = row.watched
+        video_result.liked = row.liked
+        video_result.queued = row.queued
+        videos.append(video_result)
+    response = YoutubeVideosResponse(videos=videos, total_pages=1)
+    # FastAPI validates the return value against response_model before encoding
+    adapter = TypeAdapter(YoutubeVideosResponse)
+    content = adapter.dump_python(
+        adapter.validate_python(response, from_attributes=True),
+        mode="json",
+        by_alias=True,
+    )
+    return JSONResponse(content=content)
+
+
+def _projected_page(rows: list[VideoRow]):
+    return YoutubeVideosResponse.model_construct(
+        videos=[_video_response(row=row) for row in rows],
+        total_pages=1,
+        next_cursor=None,
+    ).json_response()
+
+
+def test_projected_page_serialization(faker):
+    """
+    Test serializing a page of videos from projected rows. It should give the
+    same JSON as validating the response models.
+    """
+
+    rows = _video_rows(faker)
+    validated = _validated_page(rows)
+    projected = _projected_page(rows)
+    assert projected.media_type == validated.media_type
+    assert projected.body == validated.body
+
+
+@pytest.mark.long
+def test_projected_page_serialization_time(faker):
+    """
+    Benchmark serializing a page of videos from projected rows against
+    validating the response models. Projected rows should be faster per page.
+    """
+
+    rows = _video_rows(faker)
+    validated_time = timeit.timeit(lambda: _validated_page(rows), number=ITERATIONS)
+    projected_time = timeit.timeit(lambda: _projected_page(rows), number=ITERATIONS)
+    assert projected_time < validated_time
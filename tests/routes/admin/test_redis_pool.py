@@ -0,0 +1,41 @@
+from fastapi import status
+
+URL = "/api/admin/redis/pool"
+
+
+async def test_redis_pool_when_not_logged_in(client):
+    """
+    Test getting redis pool stats when not logged in.
+    The endpoint should return a 401 status.
+    """
+
+    response = await client.get(URL)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+async def test_redis_pool_when_not_logged_in_as_admin(client, create_and_login_user):
+    """
+    Test getting redis pool stats when not logged in as admin.
+    The endpoint should return a 403 status.
+    """
+
+    await create_and_login_user()
+
+    response = await client.get(URL)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+async def test_redis_pool(client, create_and_login_user):
+    """
+    Test getting redis pool stats when logged in as admin. The endpoint
+    should return a 200 status with the pool's connection counts.
+    """
+
+    await create_and_login_user(admin=True)
+
+    response = await client.get(URL)
+    assert response.status_code == status.HTTP_200_OK
+    stats = response.json()
+    assert stats["maxConnections"] == 50
+    assert stats["inUseConnections"] == 0
+    assert stats["availableConnections"] >= 1
@@ -4,6 +4,7 @@ import pytest
 from fastapi import BackgroundTasks, status
 
 from app.routes.admin import run_update_channel_videos
+from app.tasks.youtube import request_channel_videos
 
 URL = "/api/admin/youtube/update_channel_videos"
 
@@ -50,9 +51,13 @@ async def test_update_channel_videos(
 
     if use_function:
         background_tasks = BackgroundTasks()
-        await run_update_channel_videos(background_tasks)
+        await run_update_channel_videos(background_tasks, full_backfill=True)
         assert len(background_tasks.tasks) == 1
         assert background_tasks.tasks[0].func == mock_update_channel_videos
+        assert background_tasks.tasks[0].kwargs == {
+            "date_after": None,
+            "full_backfill": True,
+        }
     else:
         response = await client.get(URL)
         assert response.status_code == status.HTTP_200_OK
@@ -79,7 +84,7 @@ async def test_update_channel_videos_for_channel(
         background_tasks = BackgroundTasks()
         await run_update_channel_videos(background_tasks, channel_id=channel_id)
         assert len(background_tasks.tasks) == 1
-        assert background_tasks.tasks[0].func == mock_add_channel_videos
+        assert background_tasks.tasks[0].func == request_channel_videos
     else:
         response = await client.get(URL)
         assert response.status_code == status.HTTP_200_OK
@@ -75,4 +75,4 @@ async def test_create(
     assert user is not None
     assert user.email == email
     assert user.verified is False
-    assert user.check_password(password) is True
+    assert await user.check_password(password) is True
@@ -3,6 +3,7 @@ from fastapi import HTTPException, status
 
 from app.db import User
 from app.routes.authentication import LoginUser, login
+from app.settings import settings
 
 URL = "/api/auth/login"
 
@@ -99,3 +100,26 @@ async def test_login_with_correct_credentials(
         )
         assert response.status_code == status.HTTP_200_OK
         assert client.cookies.get("token") not in ["null", None]
+
+
+async def test_login_rehashes_password(
+    client, faker, create_user, db_session, monkeypatch
+):
+    """
+    Test logging in after the password cost factor has changed. The stored
+    hash should be replaced with one using the new cost factor.
+    """
+
+    monkeypatch.setattr(settings, "password_hash_rounds", 4)
+    password = faker.password()
+    user: User = await create_user(password=password)
+    old_hash = user.password
+
+    monkeypatch.setattr(settings, "password_hash_rounds", 5)
+    response = await client.post(URL, json={"email": user.email, "password": password})
+    assert response.status_code == status.HTTP_200_OK
+
+    await db_session.refresh(user)
+    assert user.password != old_hash
+    assert user.password.startswith("$2b$05$")
+    assert await user.check_password(password) is True
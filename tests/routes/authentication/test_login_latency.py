@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import status
+
+from app.db import User
+from app.services import jwt, passwords
+
+LOGIN_URL = "/api/auth/login"
+SESSION_URL = "/api/auth/session"
+LOGINS = 8
+
+
+async def _blocking_run(func, *args):
+    return func(*args)
+
+
+async def _session_latency_during_logins(client, email: str, password: str):
+    headers = {"Authorization": f"Bearer {await jwt.create(email=email)}"}
+    logins = asyncio.gather(
+        *[
+            client.post(LOGIN_URL, json={"email": email, "password": password})
+            for _ in range(LOGINS)
+        ]
+    )
+    latencies = []
+    while not logins.done():
+        start = time.perf_counter()
+        response = await client.get(SESSION_URL, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == status.HTTP_200_OK
+        await asyncio.sleep(0.01)
+    for response in await logins:
+        assert response.status_code == status.HTTP_200_OK
+    return max(latencies)
+
+
+@pytest.mark.long
+async def test_session_latency_during_login_burst(
+    client, faker, create_user, monkeypatch
+):
+    """
+    Test requesting the session endpoint while a burst of logins is being
+    processed. Session requests should not wait behind password checks once
+    they run in the password pool.
+    """
+
+    password = faker.password()
+    user: User = await create_user(password=password)
+
+    pooled = await _session_latency_during_logins(
+        client, email=user.email, password=password
+    )
+    monkeypatch.setattr(passwords, "_run", _blocking_run)
+    blocking = await _session_latency_during_logins(
+        client, email=user.email, password=password
+    )
+    # Blocking waits behind at least one full password check
+    assert pooled < blocking / 2
@@ -23,13 +23,30 @@ async def test_logout_when_logged_in(client, create_and_login_user, use_function
     response but with cleared cookies.
     """
 
-    await create_and_login_user()
+    user = await create_and_login_user()
 
     if use_function:
-        response = await logout()
+        response = await logout(user)
         assert response.status_code == status.HTTP_200_OK
         assert response.headers.get("set-cookie") is not None
     else:
         response = await client.delete(URL)
         assert response.status_code == status.HTTP_200_OK
         assert client.cookies.get("token") in ["null", None]
+
+
+async def test_logout_revokes_session(client, create_and_login_user):
+    """
+    Test reusing a session cookie after logging out. The revoked session
+    should no longer authenticate requests.
+    """
+
+    await create_and_login_user()
+    token = client.cookies.get("token")
+
+    response = await client.delete(URL)
+    assert response.status_code == status.HTTP_200_OK
+
+    client.cookies.set("token", token)
+    response = await client.get("/api/auth/session")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
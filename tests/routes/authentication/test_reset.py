@@ -87,4 +87,23 @@ async def test_reset(client, create_user, faker, db_session, redis, use_function
         assert response.status_code == status.HTTP_204_NO_CONTENT
 
     await db_session.refresh(user)
-    assert user.check_password(new_password) is True
+    assert await user.check_password(new_password) is True
+
+
+async def test_reset_revokes_sessions(client, create_and_login_user, faker, redis):
+    """
+    Test resetting a password while logged in. Every existing session of the
+    user should be revoked.
+    """
+
+    user: User = await create_and_login_user()
+    token = faker.uuid4()
+    await redis.set(f"reset:{token}", user.email)
+
+    response = await client.post(
+        URL, json={"token": token, "password": faker.password()}
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = await client.get("/api/auth/session")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
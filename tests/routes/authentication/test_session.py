@@ -1,6 +1,8 @@
 from fastapi import status
+from sqlalchemy import event
 
-from app.db import User
+from app.db import User, engine
+from app.dependencies import user_cache
 
 URL = "/api/auth/session"
 
@@ -37,3 +39,74 @@ async def test_session_when_logged_in_as_admin(client, create_and_login_user):
     response = await client.get(URL)
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"email": user.email, "admin": user.admin}
+
+
+async def test_session_with_authorization_header(client, faker, create_user):
+    """
+    Test getting user details from session with a bearer token and no cookie.
+    The endpoint should return a 200 response with the user's details.
+    """
+
+    password = faker.password()
+    user: User = await create_user(password=password)
+    response = await client.post(
+        "/api/auth/login", json={"email": user.email, "password": password}
+    )
+    access_token = response.json()["access_token"]
+    client.cookies.clear()
+
+    response = await client.get(
+        URL, headers={"Authorization": f"Bearer {access_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"email": user.email, "admin": user.admin}
+
+
+async def test_session_with_cached_user(client, faker, create_user, db_session):
+    """
+    Test getting user details with a bearer token after the user changed in
+    the database. The endpoint should return the cached user until the cache
+    for the user is invalidated.
+    """
+
+    password = faker.password()
+    user: User = await create_user(password=password)
+    response = await client.post(
+        "/api/auth/login", json={"email": user.email, "password": password}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    client.cookies.clear()
+    response = await client.get(URL, headers=headers)
+    assert response.json() == {"email": user.email, "admin": False}
+
+    user.admin = True
+    await db_session.commit()
+    response = await client.get(URL, headers=headers)
+    assert response.json() == {"email": user.email, "admin": False}
+
+    user_cache.invalidate(email=user.email)
+    response = await client.get(URL, headers=headers)
+    assert response.json() == {"email": user.email, "admin": True}
+
+
+async def test_session_from_cookie_without_user_query(client, create_and_login_user):
+    """
+    Test getting user details from a cookie session. The user should come from
+    the stored session without querying the database.
+    """
+
+    user: User = await create_and_login_user(admin=True)
+    statements = []
+
+    def _record_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record_statement)
+    try:
+        response = await client.get(URL)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record_statement)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"email": user.email, "admin": True}
+    assert statements == []
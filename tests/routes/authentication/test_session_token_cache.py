@@ -0,0 +1,43 @@
+import asyncio
+
+import jwt as pyjwt
+from fastapi import status
+
+from app.db import User
+from app.services import jwt
+from app.settings import settings
+
+URL = "/api/auth/session"
+REQUESTS = 5
+
+
+async def test_session_verifies_bearer_token_once(client, create_user, monkeypatch):
+    """
+    Test repeated bearer token requests to the session endpoint. The token
+    should be verified once, inline, and never handed off to a thread.
+    """
+
+    user: User = await create_user()
+    headers = {"Authorization": f"Bearer {await jwt.create(email=user.email)}"}
+    # Resolve the user on every request so that the token is decoded each time
+    monkeypatch.setattr(settings, "auth_user_cache_ttl", 0)
+    jwt._verified_tokens.clear()
+
+    counts = {"verified": 0, "threaded": 0}
+    decode, to_thread = pyjwt.decode, asyncio.to_thread
+
+    def _decode(*args, **kwargs):
+        counts["verified"] += 1
+        return decode(*args, **kwargs)
+
+    async def _to_thread(func, *args, **kwargs):
+        if func is _decode:
+            counts["threaded"] += 1
+        return await to_thread(func, *args, **kwargs)
+
+    monkeypatch.setattr(pyjwt, "decode", _decode)
+    monkeypatch.setattr(asyncio, "to_thread", _to_thread)
+    for _ in range(REQUESTS):
+        response = await client.get(URL, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+    assert counts == {"verified": 1, "threaded": 0}
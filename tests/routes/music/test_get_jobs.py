@@ -24,7 +24,7 @@ async def test_get_jobs_with_no_results(client, create_and_login_user):
     await create_and_login_user()
     response = await client.get(URL.format(page=1, per_page=50))
     assert response.status_code == status.HTTP_200_OK
-    assert response.json() == {"jobs": [], "totalPages": 0}
+    assert response.json() == {"jobs": [], "totalPages": 0, "nextCursor": None}
 
 
 async def test_get_jobs(client, create_user, create_and_login_user, create_music_job):
@@ -73,3 +73,35 @@ async def test_get_jobs(client, create_user, create_and_login_user, create_music
             reverse=True,
         )
     ]
+
+
+async def test_get_jobs_with_cursor(client, create_and_login_user, create_music_job):
+    """
+    Test getting music jobs page by page with cursors. The endpoint should
+    return a 200 response and every job exactly once in descending order
+    of created at.
+    """
+
+    user: User = await create_and_login_user()
+    user_jobs: list[MusicJob] = [
+        await create_music_job(email=user.email, title=f"job_{i}") for i in range(5)
+    ]
+
+    job_ids = []
+    cursor = None
+    while True:
+        params = {"per_page": 2, "include_total": False}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/music/jobs/list", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        json = response.json()
+        assert json["totalPages"] is None
+        job_ids.extend(job["id"] for job in json["jobs"])
+        if not (cursor := json["nextCursor"]):
+            break
+
+    assert job_ids == [
+        job.id
+        for job in sorted(user_jobs, key=lambda job: job.created_at, reverse=True)
+    ]
@@ -41,6 +41,6 @@ async def test_get_webdav(
     response = await client.get(URL)
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
-    assert data["username"] == WebDav.decrypt_value(webdav.username)
-    assert data["password"] == WebDav.decrypt_value(webdav.password)
+    assert data["username"] == WebDav.decrypt_value(webdav.encrypted_username)
+    assert data["password"] == WebDav.decrypt_value(webdav.encrypted_password)
     assert data["url"] == webdav.url
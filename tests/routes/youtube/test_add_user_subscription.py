@@ -4,9 +4,10 @@ import pytest
 from fastapi import BackgroundTasks, status
 from sqlalchemy import select
 
-from app.db import User, YoutubeChannel, YoutubeSubscription
+from app.db import User, YoutubeChannel, YoutubeFeedVideo, YoutubeSubscription
 from app.routes.youtube.subscriptions import add_user_subscription
 from app.services import google
+from app.tasks.youtube import request_channel_videos
 
 URL = "/api/youtube/subscriptions/user"
 
@@ -79,6 +80,7 @@ async def test_add_user_subscription_with_existing_deleted_subscription(
     monkeypatch,
     create_and_login_user,
     create_youtube_subscription,
+    create_youtube_video,
     db_session,
     use_function,
 ):
@@ -96,6 +98,7 @@ async def test_add_user_subscription_with_existing_deleted_subscription(
     user: User = await create_and_login_user()
     await create_youtube_subscription(email=user.email, deleted=True)
     channel = await db_session.scalar(select(YoutubeChannel))
+    video = await create_youtube_video(channel_id=channel.id)
 
     mock_get_channel_info.return_value = google.YoutubeChannelInfo(
         id=channel.id, title=channel.title, thumbnail=channel.thumbnail
@@ -105,7 +108,7 @@ async def test_add_user_subscription_with_existing_deleted_subscription(
         background_tasks = BackgroundTasks()
         await add_user_subscription(user, db_session, background_tasks, channel.id)
         assert len(background_tasks.tasks) == 1
-        assert background_tasks.tasks[0].func == mock_task
+        assert background_tasks.tasks[0].func == request_channel_videos
     else:
         response = await client.put(URL, params={"channel_id": channel.id})
         assert response.status_code == status.HTTP_200_OK
@@ -124,6 +127,9 @@ async def test_add_user_subscription_with_existing_deleted_subscription(
         )
     )
     assert subscription
+    feed_video = await db_session.scalar(select(YoutubeFeedVideo))
+    assert feed_video.email == user.email
+    assert feed_video.video_id == video.id
 
 
 @pytest.mark.parametrize("use_function", [True, False])
@@ -157,7 +163,7 @@ async def test_add_user_subscription_with_existing_channel(
         background_tasks = BackgroundTasks()
         await add_user_subscription(user, db_session, background_tasks, channel.id)
         assert len(background_tasks.tasks) == 1
-        assert background_tasks.tasks[0].func == mock_task
+        assert background_tasks.tasks[0].func == request_channel_videos
     else:
         response = await client.put(URL, params={"channel_id": channel.id})
         assert response.status_code == status.HTTP_200_OK
@@ -212,7 +218,7 @@ async def test_add_user_subscription_with_new_channel(
         background_tasks = BackgroundTasks()
         await add_user_subscription(user, db_session, background_tasks, channel_id)
         assert len(background_tasks.tasks) == 1
-        assert background_tasks.tasks[0].func == mock_task
+        assert background_tasks.tasks[0].func == request_channel_videos
     else:
         response = await client.put(URL, params={"channel_id": channel_id})
         assert response.status_code == status.HTTP_200_OK
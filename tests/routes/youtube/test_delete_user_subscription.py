@@ -1,7 +1,8 @@
 import pytest
 from fastapi import HTTPException, status
+from sqlalchemy import select
 
-from app.db import User, YoutubeSubscription
+from app.db import User, YoutubeFeedVideo, YoutubeSubscription
 from app.routes.youtube.subscriptions import delete_user_subscription
 
 URL = "/api/youtube/subscriptions/user"
@@ -38,17 +39,24 @@ async def test_deleting_user_subscription_for_non_existent_channel(
 
 @pytest.mark.parametrize("use_function", [True, False])
 async def test_deleting_user_subscription(
-    client, create_youtube_subscription, create_and_login_user, db_session, use_function
+    client,
+    create_youtube_subscription,
+    create_youtube_video,
+    create_and_login_user,
+    db_session,
+    use_function,
 ):
     """
     Test deleting a user subscription. It update the subscription deleted_at
-    column and return a 200 status.
+    column, remove the channel's videos from the user's feed and return a
+    200 status.
     """
 
     user: User = await create_and_login_user()
     subscription: YoutubeSubscription = await create_youtube_subscription(
         email=user.email
     )
+    await create_youtube_video(channel_id=subscription.channel_id)
 
     if use_function:
         response = await delete_user_subscription(
@@ -63,3 +71,4 @@ async def test_deleting_user_subscription(
 
     await db_session.refresh(subscription)
     assert subscription.deleted_at is not None
+    assert not (await db_session.scalars(select(YoutubeFeedVideo))).all()
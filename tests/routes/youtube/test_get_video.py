@@ -1,6 +1,8 @@
+from datetime import timedelta
+
 import pytest
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import event, select
 
 from app.db import (
     User,
@@ -12,6 +14,7 @@ from app.db import (
     YoutubeVideoWatch,
 )
 from app.routes.youtube.videos import get_youtube_video
+from app.services import relatedvideos
 
 URL = "/api/youtube/videos/{video_id}"
 
@@ -177,3 +180,79 @@ async def test_get_video_with_related_videos(
             expected_related_videos, key=lambda rv: rv.published_at, reverse=True
         )
     ]
+
+
+async def test_get_video_with_related_videos_query_count(
+    create_and_login_user, create_youtube_video, db_session
+):
+    """
+    Test getting a youtube video with related videos and statuses once the
+    related videos are cached. The video and the related videos should each
+    be loaded with a single query.
+    """
+
+    user: User = await create_and_login_user()
+    video: YoutubeVideo = await create_youtube_video()
+    related_video: YoutubeVideo = await create_youtube_video(
+        category_id=video.category_id
+    )
+    like = YoutubeVideoLike(video_id=related_video.id, email=user.email)
+    db_session.add(like)
+    await db_session.commit()
+    await get_youtube_video(user, db_session, video_id=video.id)
+
+    statements = []
+
+    def _record_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(
+        db_session.bind.sync_engine, "before_cursor_execute", _record_statement
+    )
+    try:
+        response = await get_youtube_video(
+            user, db_session, video_id=video.id, related_videos_length=5
+        )
+    finally:
+        event.remove(
+            db_session.bind.sync_engine, "before_cursor_execute", _record_statement
+        )
+
+    assert len(statements) == 2
+    assert response.liked is None
+    assert [(related.id, related.liked) for related in response.related_videos] == [
+        (related_video.id, like.created_at)
+    ]
+
+
+async def test_get_video_with_cached_related_videos(
+    create_and_login_user, create_youtube_video, db_session
+):
+    """
+    Test getting a youtube video after newer videos were added to its category
+    outside of the channel videos task. The related videos should come from the
+    cache until the category is invalidated.
+    """
+
+    user: User = await create_and_login_user()
+    video: YoutubeVideo = await create_youtube_video()
+    related_video: YoutubeVideo = await create_youtube_video(
+        category_id=video.category_id
+    )
+
+    response = await get_youtube_video(user, db_session, video_id=video.id)
+    assert [related.id for related in response.related_videos] == [related_video.id]
+
+    newer_video: YoutubeVideo = await create_youtube_video(
+        category_id=video.category_id,
+        published_at=related_video.published_at + timedelta(days=1),
+    )
+    response = await get_youtube_video(user, db_session, video_id=video.id)
+    assert [related.id for related in response.related_videos] == [related_video.id]
+
+    await relatedvideos.invalidate_related_videos(category_ids=[video.category_id])
+    response = await get_youtube_video(user, db_session, video_id=video.id)
+    assert [related.id for related in response.related_videos] == [
+        newer_video.id,
+        related_video.id,
+    ]
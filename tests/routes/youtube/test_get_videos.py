@@ -75,6 +75,7 @@ async def test_get_videos_from_specific_channel(
             )
         ],
         "totalPages": 1,
+        "nextCursor": None,
     }
 
 
@@ -131,6 +132,7 @@ async def test_get_videos_from_subscribed_channels(
             )
         ],
         "totalPages": 1,
+        "nextCursor": None,
     }
 
 
@@ -188,6 +190,7 @@ async def test_get_videos_with_specific_categories(
             )
         ],
         "totalPages": 1,
+        "nextCursor": None,
     }
 
 
@@ -249,6 +252,7 @@ async def test_get_videos_with_queued_only(
             for video, queue in sorted(queued_videos, key=lambda v: v[1].created_at)
         ],
         "totalPages": 1,
+        "nextCursor": None,
     }
 
 
@@ -312,6 +316,7 @@ async def test_get_videos_with_liked_only(
             )
         ],
         "totalPages": 1,
+        "nextCursor": None,
     }
 
 
@@ -370,4 +375,61 @@ async def test_get_videos_with_watches(
             )
         ],
         "totalPages": 1,
+        "nextCursor": None,
     }
+
+
+async def test_get_videos_with_cursor(
+    client,
+    create_and_login_user,
+    create_youtube_channel,
+    create_youtube_video,
+    create_youtube_video_category,
+):
+    """
+    Test getting youtube videos page by page with cursors. The endpoint should
+    return a 200 status, a cursor while more videos remain, and every video
+    exactly once in descending order of published at.
+    """
+
+    await create_and_login_user()
+    channel: YoutubeChannel = await create_youtube_channel()
+    category: YoutubeVideoCategory = await create_youtube_video_category()
+    channel_videos: list[YoutubeVideo] = [
+        await create_youtube_video(channel_id=channel.id, category_id=category.id)
+        for _ in range(15)
+    ]
+
+    params = {"per_page": 10, "channel_id": channel.id}
+    response = await client.get(URL, params=params)
+    assert response.status_code == status.HTTP_200_OK
+    first_page = response.json()
+    assert first_page["totalPages"] == 2
+    assert first_page["nextCursor"]
+
+    response = await client.get(
+        URL, params={**params, "cursor": first_page["nextCursor"]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    second_page = response.json()
+    assert second_page["totalPages"] is None
+    assert second_page["nextCursor"] is None
+
+    video_ids = [video["id"] for video in first_page["videos"]]
+    video_ids.extend(video["id"] for video in second_page["videos"])
+    assert video_ids == [
+        video.id
+        for video in sorted(channel_videos, key=lambda v: v.published_at, reverse=True)
+    ]
+
+
+async def test_get_videos_with_invalid_cursor(client, create_and_login_user):
+    """
+    Test getting youtube videos with a cursor that was not issued by the
+    endpoint. The endpoint should return a 400 status.
+    """
+
+    await create_and_login_user()
+
+    response = await client.get(URL, params={"per_page": 10, "cursor": "invalid"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
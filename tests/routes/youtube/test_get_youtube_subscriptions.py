@@ -2,6 +2,7 @@ from fastapi import status
 from sqlalchemy import select
 
 from app.db import User, YoutubeChannel, YoutubeSubscription
+from app.settings import settings
 
 URL = "/api/youtube/subscriptions/list"
 
@@ -73,3 +74,64 @@ async def test_get_user_subscriptions(
             key=lambda channel: channel["title"],
         ),
     }
+
+
+async def test_get_user_subscriptions_with_cached_total(
+    client, create_and_login_user, create_youtube_subscription, create_youtube_channel
+):
+    """
+    Test getting user subscriptions after the total was counted. The
+    endpoint should return the cached total until the user changes
+    their subscriptions.
+    """
+
+    user: User = await create_and_login_user()
+    channels: list[YoutubeChannel] = []
+    for _ in range(2):
+        channel = await create_youtube_channel()
+        await create_youtube_subscription(email=user.email, channel_id=channel.id)
+        channels.append(channel)
+
+    response = await client.get(URL, params={"page": 1, "per_page": 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["totalPages"] == 2
+
+    channel = await create_youtube_channel()
+    await create_youtube_subscription(email=user.email, channel_id=channel.id)
+    response = await client.get(URL, params={"page": 1, "per_page": 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["totalPages"] == 2
+
+    for channel in channels:
+        response = await client.delete(
+            "/api/youtube/subscriptions/user", params={"channel_id": channel.id}
+        )
+        assert response.status_code == status.HTTP_200_OK
+    response = await client.get(URL, params={"page": 1, "per_page": 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["totalPages"] == 1
+
+
+async def test_get_user_subscriptions_with_estimated_total(
+    client,
+    create_and_login_user,
+    create_youtube_subscription,
+    create_youtube_channel,
+    monkeypatch,
+):
+    """
+    Test getting user subscriptions with an estimated total. The endpoint
+    should return a 200 status and the total from the query planner.
+    """
+
+    monkeypatch.setattr(settings, "pagination_estimate_threshold", 0)
+    user: User = await create_and_login_user()
+    channel = await create_youtube_channel()
+    await create_youtube_subscription(email=user.email, channel_id=channel.id)
+
+    response = await client.get(
+        URL, params={"page": 1, "per_page": 50, "estimate_total": True}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["channels"]) == 1
+    assert isinstance(response.json()["totalPages"], int)
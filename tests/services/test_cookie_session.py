@@ -0,0 +1,65 @@
+from app.services import cookie_session
+from app.settings import settings
+
+
+async def test_create_stores_hashed_session(faker, redis):
+    """
+    Test creating a session. The session should be stored under a digest of
+    the token with the user's email and admin flag.
+    """
+
+    email = faker.email()
+    token = await cookie_session.create(email=email, admin=True)
+
+    assert await redis.exists(f"session:{token}") == 0
+    session_key = cookie_session.SESSION_KEY.format(
+        session_id=cookie_session._session_id(token)
+    )
+    assert await redis.hgetall(session_key) == {
+        b"email": email.encode(),
+        b"admin": b"1",
+    }
+    assert await cookie_session.get(token) == cookie_session.Session(
+        email=email, admin=True
+    )
+
+
+async def test_get_refreshes_session_ttl(faker, redis):
+    """
+    Test reading a session that is close to expiring. Reading it should extend
+    the expiry of the session and the user's session index back to the full
+    session ttl.
+    """
+
+    email = faker.email()
+    token = await cookie_session.create(email=email)
+    session_key = cookie_session.SESSION_KEY.format(
+        session_id=cookie_session._session_id(token)
+    )
+    user_sessions_key = cookie_session.USER_SESSIONS_KEY.format(email=email)
+    await redis.expire(session_key, 10)
+    await redis.expire(user_sessions_key, 10)
+
+    assert await cookie_session.get(token) is not None
+    assert await redis.ttl(session_key) > settings.session_ttl - 10
+    assert await redis.ttl(user_sessions_key) > settings.session_ttl - 10
+
+
+async def test_revoke_user_sessions(faker):
+    """
+    Test revoking every session of a user. None of the user's sessions should
+    be valid afterwards while other users' sessions are kept.
+    """
+
+    email = faker.email()
+    tokens = [await cookie_session.create(email=email) for _ in range(3)]
+    other_token = await cookie_session.create(email=faker.email())
+
+    await cookie_session.revoke(token=tokens[0])
+    assert await cookie_session.get(tokens[0]) is None
+    assert await cookie_session.get(tokens[1]) is not None
+
+    await cookie_session.revoke_user(email=email)
+    for token in tokens:
+        assert await cookie_session.get(token) is None
+    assert await cookie_session.get(other_token) is not None
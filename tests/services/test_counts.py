@@ -0,0 +1,41 @@
+from app.services.counts import CountCache, CountScope, invalidate_counts
+
+
+async def test_count_cache_reuses_count(faker):
+    """
+    Test counting twice with the same filters. The second count should
+    come from the cache.
+    """
+
+    count_cache = CountCache(
+        scope=CountScope.VIDEOS, email=faker.email(), filters={"liked_only": True}
+    )
+    counts = iter([10, 20])
+
+    async def count():
+        return next(counts)
+
+    assert await count_cache.count(count=count) == 10
+    assert await count_cache.count(count=count) == 10
+    assert await count_cache.count(count=count, estimate=True) == 20
+
+
+async def test_count_cache_after_invalidation(faker):
+    """
+    Test counting after the user's counts were invalidated. The count
+    should be recomputed and other scopes should stay cached.
+    """
+
+    email = faker.email()
+    videos_cache = CountCache(scope=CountScope.VIDEOS, email=email)
+    jobs_cache = CountCache(scope=CountScope.MUSIC_JOBS, email=email)
+    counts = iter([1, 2, 3])
+
+    async def count():
+        return next(counts)
+
+    assert await videos_cache.count(count=count) == 1
+    assert await jobs_cache.count(count=count) == 2
+    await invalidate_counts(email=email, scopes=[CountScope.VIDEOS])
+    assert await videos_cache.count(count=count) == 3
+    assert await jobs_cache.count(count=count) == 2
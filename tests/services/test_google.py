@@ -0,0 +1,289 @@
+import asyncio
+import json
+from contextlib import aclosing
+
+import httpx
+import pytest
+import respx
+
+from app.services import google
+
+URL = "https://youtube.googleapis.com/youtube/v3/videoCategories"
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def api_client():
+    yield
+    await google.close_client()
+
+
+def _error_response(status_code: int, reason: str):
+    return httpx.Response(
+        status_code,
+        headers={"Retry-After": "0"},
+        json={"error": {"errors": [{"reason": reason}]}},
+    )
+
+
+@respx.mock
+async def test_get_retries_when_rate_limited():
+    """
+    Test requesting the youtube api when rate limited. The request should
+    be retried until it succeeds.
+    """
+
+    route = respx.get(URL).mock(
+        side_effect=[
+            _error_response(429, "rateLimitExceeded"),
+            _error_response(403, "userRateLimitExceeded"),
+            httpx.Response(200, json={"items": []}),
+        ]
+    )
+
+    response = await google._get("/youtube/v3/videoCategories", params={})
+    assert response.status_code == 200
+    assert route.call_count == 3
+
+
+@respx.mock
+async def test_get_stops_when_quota_exceeded():
+    """
+    Test requesting the youtube api when the quota is exceeded. The request
+    should fail without retrying and following requests should fail without
+    calling the api.
+    """
+
+    route = respx.get(URL).mock(return_value=_error_response(403, "quotaExceeded"))
+
+    with pytest.raises(google.QuotaExceededError):
+        await google._get("/youtube/v3/videoCategories", params={})
+    with pytest.raises(google.QuotaExceededError):
+        await google._get("/youtube/v3/videoCategories", params={})
+    assert route.call_count == 1
+
+
+@respx.mock
+async def test_get_reuses_client():
+    """
+    Test requesting the youtube api multiple times. The requests should share
+    one pooled client.
+    """
+
+    respx.get(URL).respond(200, json={"items": []})
+
+    await google._get("/youtube/v3/videoCategories", params={})
+    client = (await google._get_api_client()).client
+    await google._get("/youtube/v3/videoCategories", params={})
+    assert (await google._get_api_client()).client is client
+
+
+async def test_get_api_client_closes_stale_client():
+    """
+    Test getting the api client after the event loop changed. The client from
+    the old loop should be closed and replaced.
+    """
+
+    api_client = await google._get_api_client()
+    api_client.loop = object()
+
+    assert (await google._get_api_client()).client is not api_client.client
+    assert api_client.client.is_closed
+
+
+@respx.mock
+async def test_get_returns_not_modified():
+    """
+    Test a conditional request to the youtube api that is answered with a 304.
+    The response should be returned instead of raising, while a 304 to a
+    request without an ETag should still raise.
+    """
+
+    respx.get(URL).respond(304)
+
+    response = await google._get(
+        "/youtube/v3/videoCategories", params={}, headers={"If-None-Match": "etag"}
+    )
+    assert response.status_code == 304
+    with pytest.raises(httpx.HTTPStatusError):
+        await google._get("/youtube/v3/videoCategories", params={})
+
+
+@respx.mock
+async def test_get_video_categories_uses_etag():
+    """
+    Test getting video categories twice when they have not changed. The second
+    request should send the cached ETag and return the cached categories.
+    """
+
+    route = respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(
+                200,
+                headers={"ETag": "etag"},
+                json={"items": [{"id": "1", "snippet": {"title": "Film"}}]},
+            ),
+            httpx.Response(304),
+        ]
+    )
+
+    for _ in range(2):
+        categories = [
+            category
+            async for page in google.get_video_categories()
+            for category in page
+        ]
+        assert categories == [google.YoutubeVideoCategory(id=1, name="Film")]
+
+    assert "If-None-Match" not in route.calls[0].request.headers
+    assert route.calls[1].request.headers["If-None-Match"] == "etag"
+
+
+@respx.mock
+async def test_get_channel_latest_videos_stops_when_playlist_unchanged():
+    """
+    Test getting the latest videos of a channel whose uploads have not changed.
+    The uploads playlist id should be cached and no videos should be returned.
+    """
+
+    channels_route = respx.get(
+        "https://youtube.googleapis.com/youtube/v3/channels"
+    ).respond(
+        200,
+        json={"items": [{"contentDetails": {"relatedPlaylists": {"uploads": "UU"}}}]},
+    )
+    respx.get("https://youtube.googleapis.com/youtube/v3/playlistItems").mock(
+        side_effect=[
+            httpx.Response(
+                200,
+                headers={"ETag": "etag"},
+                json={"items": [{"contentDetails": {"videoId": "video"}}]},
+            ),
+            httpx.Response(304),
+        ]
+    )
+    videos_route = respx.get(
+        "https://youtube.googleapis.com/youtube/v3/videos"
+    ).respond(200, json={"items": []})
+
+    assert [page async for page in google.get_channel_latest_videos("channel")] == [[]]
+    assert [page async for page in google.get_channel_latest_videos("channel")] == []
+    assert channels_route.call_count == 1
+    assert videos_route.call_count == 1
+
+
+@respx.mock
+async def test_get_channel_latest_videos_defers_etags():
+    """
+    Test getting the latest videos of a channel with deferred ETags. The
+    playlist should not be treated as unchanged until the ETags are saved.
+    """
+
+    respx.get("https://youtube.googleapis.com/youtube/v3/channels").respond(
+        200,
+        json={"items": [{"contentDetails": {"relatedPlaylists": {"uploads": "UU"}}}]},
+    )
+    playlist_route = respx.get(
+        "https://youtube.googleapis.com/youtube/v3/playlistItems"
+    ).mock(
+        side_effect=[
+            httpx.Response(
+                200,
+                headers={"ETag": "etag"},
+                json={"items": [{"contentDetails": {"videoId": "video"}}]},
+            ),
+            httpx.Response(
+                200,
+                headers={"ETag": "etag"},
+                json={"items": [{"contentDetails": {"videoId": "video"}}]},
+            ),
+            httpx.Response(304),
+        ]
+    )
+    respx.get("https://youtube.googleapis.com/youtube/v3/videos").respond(
+        200, json={"items": []}
+    )
+
+    etags = google.DeferredETags()
+    pages = [
+        page async for page in google.get_channel_latest_videos("channel", etags=etags)
+    ]
+    assert pages == [[]]
+    # A crawl that never saved its pages should crawl them again
+    pages = [page async for page in google.get_channel_latest_videos("channel")]
+    assert pages == [[]]
+    assert "If-None-Match" not in playlist_route.calls[1].request.headers
+
+    await etags.save()
+    pages = [page async for page in google.get_channel_latest_videos("channel")]
+    assert pages == []
+    assert playlist_route.calls[2].request.headers["If-None-Match"] == "etag"
+
+
+@respx.mock
+async def test_get_channel_latest_videos_skips_unconsumed_etags():
+    """
+    Test getting the latest videos of a channel and stopping after the first
+    page. Only the ETag of the consumed page should be deferred, not the ETag
+    of the page prefetched after it.
+    """
+
+    respx.get("https://youtube.googleapis.com/youtube/v3/channels").respond(
+        200,
+        json={"items": [{"contentDetails": {"relatedPlaylists": {"uploads": "UU"}}}]},
+    )
+    respx.get("https://youtube.googleapis.com/youtube/v3/playlistItems").mock(
+        side_effect=[
+            httpx.Response(
+                200,
+                headers={"ETag": f"etag{page}"},
+                json={
+                    "items": [{"contentDetails": {"videoId": f"video{page}"}}],
+                    "nextPageToken": f"page{page + 1}",
+                },
+            )
+            for page in range(3)
+        ]
+    )
+    respx.get("https://youtube.googleapis.com/youtube/v3/videos").respond(
+        200, json={"items": []}
+    )
+
+    etags = google.DeferredETags()
+    async with aclosing(
+        google.get_channel_latest_videos("channel", etags=etags)
+    ) as channel_videos:
+        pages = 0
+        async for _ in channel_videos:
+            pages += 1
+            if pages == 2:
+                break
+    assert [json.loads(value)["etag"] for value in etags.entries.values()] == ["etag0"]
+
+
+async def test_rate_limit_shared_between_processes():
+    """
+    Test taking tokens from limiters in separate processes. They should draw
+    from one shared bucket, so its capacity is not multiplied per process.
+    """
+
+    limiters = [google.TokenBucket(rate=0.001, capacity=2) for _ in range(2)]
+    await limiters[0].acquire()
+    await limiters[1].acquire()
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(limiters[1].acquire(), timeout=0.5)
+
+
+@respx.mock
+async def test_quota_exceeded_shared_between_processes():
+    """
+    Test requesting the youtube api after another process exceeded the quota.
+    The request should fail without calling the api.
+    """
+
+    route = respx.get(URL).mock(return_value=_error_response(403, "quotaExceeded"))
+
+    with pytest.raises(google.QuotaExceededError):
+        await google._get("/youtube/v3/videoCategories", params={})
+    with pytest.raises(google.QuotaExceededError):
+        await google.TokenBucket(rate=1, capacity=1).acquire()
+    assert route.call_count == 1
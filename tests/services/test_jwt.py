@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt as pyjwt
+
+from app.services import jwt
+from app.settings import settings
+
+
+async def test_decode_caches_verified_token(faker, monkeypatch):
+    """
+    Test decoding the same token twice. The second decode should come from
+    the verified token cache without verifying the signature again.
+    """
+
+    token = await jwt.create(email=faker.email())
+    payload = await jwt.decode(token)
+
+    def _decode(*args, **kwargs):
+        raise AssertionError("Token was verified again")
+
+    monkeypatch.setattr(pyjwt, "decode", _decode)
+    assert await jwt.decode(token) == payload
+
+
+async def test_decode_expired_token(faker):
+    """
+    Test decoding an expired token and a token with a bad signature. Neither
+    should be accepted.
+    """
+
+    expired_token = pyjwt.encode(
+        payload={
+            "sub": faker.email(),
+            "exp": (datetime.now(timezone.utc) - timedelta(minutes=1)).timestamp(),
+        },
+        key=settings.secret_key,
+        algorithm=jwt.ALGORITHM,
+    )
+    assert await jwt.decode(expired_token) is None
+
+    token = await jwt.create(email=faker.email())
+    assert await jwt.decode(token[:-2]) is None
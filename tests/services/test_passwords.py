@@ -0,0 +1,41 @@
+import threading
+
+from app.services import passwords
+from app.settings import settings
+
+
+async def test_hash_password_off_event_loop(faker, monkeypatch):
+    """
+    Test hashing and checking a password. Both should run in the password
+    pool rather than on the event loop thread.
+    """
+
+    threads = []
+    hash_password = passwords._hash_password
+
+    def _hash_password(*args):
+        threads.append(threading.current_thread())
+        return hash_password(*args)
+
+    monkeypatch.setattr(passwords, "_hash_password", _hash_password)
+    password = faker.password()
+    hashed_password = await passwords.hash_password(password)
+
+    assert threads and threads[0] is not threading.current_thread()
+    assert await passwords.check_password(password, hashed_password) is True
+    assert await passwords.check_password(faker.password(), hashed_password) is False
+
+
+async def test_needs_rehash(faker, monkeypatch):
+    """
+    Test checking a hash against the configured cost factor. Only a hash made
+    with a different cost should need rehashing.
+    """
+
+    monkeypatch.setattr(settings, "password_hash_rounds", 4)
+    hashed_password = await passwords.hash_password(faker.password())
+    assert hashed_password.startswith("$2b$04$")
+    assert passwords.needs_rehash(hashed_password) is False
+
+    monkeypatch.setattr(settings, "password_hash_rounds", 5)
+    assert passwords.needs_rehash(hashed_password) is True
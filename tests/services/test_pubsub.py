@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from redis.asyncio import Redis
+
+from app.services.pubsub import PubSub, hub
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def pubsub_hub():
+    yield
+    await hub.close()
+
+
+async def _get_subscriber_count(redis: Redis, channel: str):
+    return (await redis.pubsub_numsub(channel))[0][1]
+
+
+async def test_hub_dispatches_messages_to_user_channel(faker, redis):
+    """
+    Test publishing a user's message while several websockets listen through
+    the hub. Only that user's queues should receive it, over a single
+    subscription to the user's channel.
+    """
+
+    email = faker.email()
+    other_email = faker.email()
+    channel = PubSub.Channels.MUSIC_JOB_UPDATE
+    user_channel = PubSub.user_channel(channel=channel, email=email)
+
+    async with (
+        hub.subscribe(channel=channel, email=email) as messages,
+        hub.subscribe(channel=channel, email=email) as other_tab_messages,
+        hub.subscribe(channel=channel, email=other_email) as other_messages,
+        hub.subscribe(
+            channel=PubSub.Channels.YOUTUBE_CHANNEL_UPDATE, email=email
+        ) as channel_messages,
+    ):
+        assert await _get_subscriber_count(redis, user_channel) == 1
+
+        await PubSub(channels=[user_channel]).publish_message(
+            message='{"id": "1", "status": "STARTED"}'
+        )
+
+        for queue in (messages, other_tab_messages):
+            message = await asyncio.wait_for(queue.get(), timeout=5)
+            assert message == '{"id": "1", "status": "STARTED"}'
+        assert other_messages.empty()
+        assert channel_messages.empty()
+
+    assert await _get_subscriber_count(redis, user_channel) == 0
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.services import redisclient
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def redis_pool():
+    yield
+    await redisclient.close_pool()
+
+
+async def test_get_redis_reuses_pooled_connections():
+    """
+    Test running commands with several redis clients. The clients should share
+    one connection pool and reuse the same connection.
+    """
+
+    for _ in range(3):
+        async with redisclient.get_redis() as redis:
+            assert await redis.ping()
+            assert redis.connection_pool is redisclient.get_pool()
+
+    assert redisclient.get_pool_stats() == {
+        "max_connections": 50,
+        "in_use_connections": 0,
+        "available_connections": 1,
+    }
+
+
+async def test_close_pool():
+    """
+    Test closing the redis connection pool. The next client should
+    use a new pool.
+    """
+
+    pool = redisclient.get_pool()
+    await redisclient.close_pool()
+    assert redisclient.get_pool_stats()["available_connections"] == 0
+    assert redisclient.get_pool() is not pool
+
+
+async def test_get_pool_closes_pool_from_another_loop():
+    """
+    Test getting the pool after another event loop used it. The old pool's
+    connections should be disconnected when it is replaced.
+    """
+
+    async def _ping():
+        async with redisclient.get_redis() as redis:
+            assert await redis.ping()
+        return redisclient.get_pool()
+
+    pool = await asyncio.to_thread(asyncio.run, _ping())
+    assert redisclient.get_pool() is not pool
+    await asyncio.gather(*redisclient._stale_pool_closes)
+    assert not any(
+        connection.is_connected for connection in pool._available_connections
+    )
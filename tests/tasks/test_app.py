@@ -0,0 +1,91 @@
+import asyncio
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import select
+
+from app.db import pool_metrics
+from app.tasks.app import Queues, QueueTask, celery, close_worker_loop
+from app.tasks.youtube import update_video_categories
+
+
+async def test_db_session_reuses_pooled_connections():
+    """
+    Test opening task database sessions multiple times. The sessions should
+    reuse connections from the shared pool instead of opening new ones.
+    """
+
+    connects = pool_metrics.connects
+    waits = pool_metrics.waits
+
+    for _ in range(3):
+        async with update_video_categories.db_session() as db_session:
+            assert await db_session.scalar(select(1)) == 1
+
+    assert pool_metrics.connects - connects <= 1
+    assert pool_metrics.waits - waits == 3
+
+
+@pytest.mark.parametrize(
+    "task_name,queue",
+    [
+        ("app.tasks.music.run_music_job", Queues.INTERACTIVE),
+        ("app.tasks.email.send_verification_email", Queues.EMAIL),
+        ("app.tasks.email.send_password_reset_email", Queues.EMAIL),
+        ("app.tasks.youtube.add_channel_videos", Queues.BULK),
+        ("app.tasks.youtube.update_channel_videos", Queues.BULK),
+    ],
+)
+async def test_task_routes(task_name, queue):
+    """
+    Test routing tasks to queues. Music jobs, emails and youtube syncs should
+    each go to their own queue.
+    """
+
+    options = celery.amqp.router.route({}, task_name)
+    assert options["queue"].name == queue
+
+
+@pytest.fixture(scope="function")
+def noop_task():
+    @celery.task(bind=True)
+    async def noop_task(self: QueueTask):
+        return None
+
+    yield noop_task
+    celery.tasks.unregister(noop_task.name)
+
+
+@pytest.mark.long
+def test_worker_loop_throughput(noop_task):
+    """
+    Benchmark no-op async task throughput when creating a new event loop per
+    task against running tasks on the persistent worker loop. The persistent
+    loop should complete more tasks per second.
+    """
+
+    iterations = 2000
+
+    def _run_with_new_loops():
+        for _ in range(iterations):
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(noop_task.run())
+            loop.close()
+
+    def _run_with_worker_loop():
+        for _ in range(iterations):
+            noop_task()
+        close_worker_loop()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        new_loops_time = timeit.timeit(
+            lambda: executor.submit(_run_with_new_loops).result(), number=1
+        )
+        worker_loop_time = timeit.timeit(
+            lambda: executor.submit(_run_with_worker_loop).result(), number=1
+        )
+
+    new_loops_rate = iterations / new_loops_time
+    worker_loop_rate = iterations / worker_loop_time
+    assert worker_loop_rate > new_loops_rate
@@ -2,6 +2,7 @@ import json
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+import respx
 import yt_dlp.utils
 from fastapi import UploadFile
 from sqlalchemy.exc import NoResultFound
@@ -11,6 +12,7 @@ from app.services import audiotags
 from app.services.httpclient import AsyncClient
 from app.services.pubsub import PubSub
 from app.settings import settings
+from app.tasks import music
 from app.tasks.music import run_music_job
 
 
@@ -60,7 +62,10 @@ async def test_run_music_job_messages(
     task = run_music_job(music_job_id=str(music_job.id))
 
     pubsub_messages = await get_pubsub_channel_messages(
-        PubSub.Channels.MUSIC_JOB_UPDATE, max_num_messages=2
+        PubSub.user_channel(
+            channel=PubSub.Channels.MUSIC_JOB_UPDATE, email=user.email
+        ),
+        max_num_messages=2,
     )
 
     await task
@@ -222,6 +227,38 @@ async def test_run_music_job_with_file(
         assert tags.grouping == expected_grouping
 
 
+async def test_run_music_job_with_file_skips_cookies(
+    monkeypatch,
+    create_user,
+    create_cookies,
+    create_music_job,
+    db_session,
+    test_audio,
+):
+    """
+    Test running a music job with a music file for a user with stored cookies.
+    The cookies should not be read, since only downloads use them.
+    """
+
+    retrieve_audio_file = music.retrieve_audio_file
+    retrieve_audio_file_mock = AsyncMock(side_effect=retrieve_audio_file)
+    monkeypatch.setattr(music, "retrieve_audio_file", retrieve_audio_file_mock)
+
+    test_file = UploadFile(
+        filename="test.mp3", file=test_audio, headers={"content-type": "audio/mpeg"}
+    )
+
+    user: User = await create_user()
+    await create_cookies(email=user.email)
+    music_job: MusicJob = await create_music_job(email=user.email, file=test_file)
+
+    await run_music_job(music_job_id=str(music_job.id))
+
+    await db_session.refresh(music_job)
+    assert music_job.completed is not None
+    assert retrieve_audio_file_mock.call_args.kwargs["cookies"] is None
+
+
 @pytest.mark.long
 async def test_run_music_job_with_external_artwork(
     create_user,
@@ -372,3 +409,53 @@ async def test_run_music_job_skips_webdav_when_disabled(
             auth=(settings.test_webdav_username, settings.test_webdav_password),
         )
         assert response.status_code == 404
+
+
+@respx.mock
+async def test_run_music_job_streams_file_uploads(
+    create_user,
+    create_music_job,
+    create_webdav,
+    db_session,
+    monkeypatch,
+    tmp_path,
+):
+    """
+    Test running a music job uploads the finished file to s3 and webdav
+    from a file handle instead of reading the whole file into memory.
+    """
+
+    user: User = await create_user()
+    webdav: WebDav = await create_webdav(email=user.email, url="http://webdav.test")
+    music_job: MusicJob = await create_music_job(
+        email=user.email, video_url="https://www.youtube.com/watch?v=C0DPdy98e4c"
+    )
+
+    audio_file = tmp_path.joinpath("temp.mp3")
+    audio_file.write_bytes(b"audio" * 1024)
+
+    monkeypatch.setattr(
+        "app.tasks.music.retrieve_audio_file", AsyncMock(return_value=str(audio_file))
+    )
+    monkeypatch.setattr("app.tasks.music.get_artwork_info", AsyncMock(return_value=None))
+    monkeypatch.setattr("app.tasks.music.update_audio_tags", MagicMock())
+    monkeypatch.setattr(MusicJob, "upload_embedded_artwork", AsyncMock())
+
+    uploaded_contents = []
+
+    async def _upload_fileobj(filename, fileobj, content_type):
+        uploaded_contents.append(fileobj.read())
+
+    monkeypatch.setattr("app.tasks.music.s3.upload_fileobj", _upload_fileobj)
+    webdav_route = respx.put(url__startswith=webdav.url).respond(201)
+
+    await run_music_job(music_job_id=str(music_job.id), upload_to_webdav=True)
+
+    await db_session.refresh(music_job)
+
+    assert music_job.completed is not None
+    assert uploaded_contents == [audio_file.read_bytes()]
+    assert webdav_route.call_count == 1
+    request = webdav_route.calls.last.request
+    assert request.headers["Content-Length"] == str(audio_file.stat().st_size)
+    assert await request.aread() == audio_file.read_bytes()
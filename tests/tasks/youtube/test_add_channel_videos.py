@@ -5,7 +5,9 @@ import pytest
 from sqlalchemy import select
 
 from app.db import (
+    User,
     YoutubeChannel,
+    YoutubeFeedVideo,
     YoutubeVideo,
     YoutubeVideoCategory,
 )
@@ -96,15 +98,20 @@ async def test_add_channel_videos_with_date_after(
 
 async def test_add_channel_videos_messages(
     monkeypatch,
+    create_user,
     create_youtube_channel,
+    create_youtube_subscription,
     get_pubsub_channel_messages,
     provide_google_api_response,
 ):
     """
-    Test add channel videos task outputs the correct pubsub messages.
+    Test add channel videos task outputs the correct pubsub messages
+    on the channels of the channel's subscribers.
     """
 
     channel: YoutubeChannel = await create_youtube_channel()
+    user: User = await create_user()
+    await create_youtube_subscription(channel_id=channel.id, email=user.email)
 
     monkeypatch.setattr(
         google,
@@ -115,7 +122,10 @@ async def test_add_channel_videos_messages(
     task = add_channel_videos(channel_id=channel.id)
 
     pubsub_messages = await get_pubsub_channel_messages(
-        PubSub.Channels.YOUTUBE_CHANNEL_UPDATE, max_num_messages=2
+        PubSub.user_channel(
+            channel=PubSub.Channels.YOUTUBE_CHANNEL_UPDATE, email=user.email
+        ),
+        max_num_messages=2,
     )
 
     await task
@@ -131,6 +141,101 @@ async def test_add_channel_videos_messages(
     }
 
 
+async def test_add_channel_videos_with_failed_crawl(
+    monkeypatch,
+    create_user,
+    create_youtube_channel,
+    create_youtube_subscription,
+    get_pubsub_channel_messages,
+    db_session,
+):
+    """
+    Test add channel videos when the crawl fails. The task should raise, and
+    the channel should no longer be updating without its last update moving.
+    """
+
+    channel: YoutubeChannel = await create_youtube_channel()
+    last_videos_updated = channel.last_videos_updated
+    user: User = await create_user()
+    await create_youtube_subscription(channel_id=channel.id, email=user.email)
+
+    async def _get_channel_latest_videos(*args, **kwargs):
+        raise google.QuotaExceededError("Youtube API quota exceeded")
+        yield
+
+    monkeypatch.setattr(google, "get_channel_latest_videos", _get_channel_latest_videos)
+
+    task = add_channel_videos(channel_id=channel.id)
+
+    pubsub_messages = await get_pubsub_channel_messages(
+        PubSub.user_channel(
+            channel=PubSub.Channels.YOUTUBE_CHANNEL_UPDATE, email=user.email
+        ),
+        max_num_messages=2,
+    )
+
+    with pytest.raises(google.QuotaExceededError):
+        await task
+
+    assert [json.loads(message["data"]) for message in pubsub_messages] == [
+        {"id": str(channel.id), "updating": True},
+        {"id": str(channel.id), "updating": False},
+    ]
+    await db_session.refresh(channel)
+    assert channel.updating is False
+    assert channel.videos_backfilled is False
+    assert channel.last_videos_updated == last_videos_updated
+
+
+async def test_add_channel_videos_adds_to_subscriber_feeds(
+    faker,
+    monkeypatch,
+    create_user,
+    create_youtube_channel,
+    create_youtube_subscription,
+    create_youtube_video_category,
+    provide_google_api_response,
+    db_session,
+):
+    """
+    Test add channel videos task for a channel with subscribers. It should
+    add the new videos to the feed of every active subscriber.
+    """
+
+    channel: YoutubeChannel = await create_youtube_channel()
+    category: YoutubeVideoCategory = await create_youtube_video_category()
+    user: User = await create_user()
+    deleted_user: User = await create_user()
+    await create_youtube_subscription(channel_id=channel.id, email=user.email)
+    await create_youtube_subscription(
+        channel_id=channel.id, email=deleted_user.email, deleted=True
+    )
+
+    published_at = faker.date_time(tzinfo=timezone.utc)
+    api_video = {
+        "id": faker.uuid4(),
+        "title": faker.word(),
+        "thumbnail": faker.url(),
+        "description": faker.word(),
+        "channel_id": channel.id,
+        "category_id": category.id,
+        "published": published_at.isoformat(),
+    }
+    monkeypatch.setattr(
+        google,
+        "get_channel_latest_videos",
+        provide_google_api_response(pages=[[api_video]], model=google.YoutubeVideoInfo),
+    )
+
+    await add_channel_videos(channel_id=channel.id)
+
+    feed_videos = (await db_session.scalars(select(YoutubeFeedVideo))).all()
+    assert [
+        (feed_video.email, feed_video.video_id, feed_video.published_at)
+        for feed_video in feed_videos
+    ] == [(user.email, api_video["id"], published_at)]
+
+
 async def test_add_channel_videos_with_update(
     monkeypatch,
     faker,
@@ -202,3 +307,129 @@ async def test_add_channel_videos_with_update(
         }
         for video in videos
     ]
+
+
+async def test_add_channel_videos_with_new_and_existing_videos(
+    monkeypatch,
+    faker,
+    create_youtube_video,
+    create_youtube_channel,
+    create_youtube_video_category,
+    provide_google_api_response,
+    db_session,
+):
+    """
+    Test add channel videos with pages mixing new and existing videos. It should
+    insert the new videos and update the existing ones across every page.
+    """
+
+    channel: YoutubeChannel = await create_youtube_channel()
+    category: YoutubeVideoCategory = await create_youtube_video_category()
+    existing_video: YoutubeVideo = await create_youtube_video(
+        channel_id=channel.id, category_id=category.id
+    )
+
+    pages = [
+        [
+            {
+                "id": faker.uuid4(),
+                "title": faker.sentence(),
+                "thumbnail": faker.image_url(),
+                "description": faker.sentence(),
+                "category_id": category.id,
+                "published": faker.date_time(tzinfo=timezone.utc).isoformat(),
+            }
+            for _ in range(5)
+        ]
+        for _ in range(3)
+    ]
+    updated_description = faker.sentence()
+    pages[1].append(
+        {
+            "id": existing_video.id,
+            "title": existing_video.title,
+            "thumbnail": existing_video.thumbnail,
+            "description": updated_description,
+            "category_id": category.id,
+            "published": faker.future_datetime(tzinfo=timezone.utc).isoformat(),
+        }
+    )
+    expected_published_at = existing_video.published_at
+
+    monkeypatch.setattr(
+        google,
+        "get_channel_latest_videos",
+        provide_google_api_response(pages=pages, model=google.YoutubeVideoInfo),
+    )
+    await add_channel_videos(channel_id=channel.id)
+
+    await db_session.refresh(existing_video)
+    video_ids = set((await db_session.scalars(select(YoutubeVideo.id))).all())
+
+    assert video_ids == {video["id"] for page in pages for video in page}
+    assert existing_video.description == updated_description
+    assert existing_video.published_at == expected_published_at
+
+
+@pytest.mark.parametrize(
+    "videos_backfilled, full_backfill", [(True, False), (True, True), (False, False)]
+)
+async def test_add_channel_videos_stops_at_known_page(
+    monkeypatch,
+    faker,
+    videos_backfilled,
+    full_backfill,
+    create_youtube_video,
+    create_youtube_channel,
+    create_youtube_video_category,
+    provide_google_api_response,
+    db_session,
+):
+    """
+    Test add channel videos when a page only has videos that already exist. It
+    should stop crawling after that page only if an earlier crawl walked the
+    whole playlist and no full backfill is requested. A crawl that walks the
+    whole playlist should mark the channel as backfilled.
+    """
+
+    channel: YoutubeChannel = await create_youtube_channel()
+    channel.videos_backfilled = videos_backfilled
+    await db_session.commit()
+    category: YoutubeVideoCategory = await create_youtube_video_category()
+    known_videos: list[YoutubeVideo] = [
+        await create_youtube_video(channel_id=channel.id, category_id=category.id)
+        for _ in range(3)
+    ]
+
+    def _api_video(video_id: str):
+        return {
+            "id": video_id,
+            "title": faker.sentence(),
+            "thumbnail": faker.image_url(),
+            "description": faker.sentence(),
+            "category_id": category.id,
+            "published": faker.date_time(tzinfo=timezone.utc).isoformat(),
+        }
+
+    new_video = _api_video(faker.uuid4())
+    older_video = _api_video(faker.uuid4())
+    pages = [
+        [new_video, _api_video(known_videos[0].id)],
+        [_api_video(video.id) for video in known_videos[1:]],
+        [older_video],
+    ]
+    monkeypatch.setattr(
+        google,
+        "get_channel_latest_videos",
+        provide_google_api_response(pages=pages, model=google.YoutubeVideoInfo),
+    )
+
+    await add_channel_videos(channel_id=channel.id, full_backfill=full_backfill)
+
+    video_ids = set((await db_session.scalars(select(YoutubeVideo.id))).all())
+    expected_video_ids = {new_video["id"], *[video.id for video in known_videos]}
+    if full_backfill or not videos_backfilled:
+        expected_video_ids.add(older_video["id"])
+    assert video_ids == expected_video_ids
+    await db_session.refresh(channel)
+    assert channel.videos_backfilled is True
@@ -0,0 +1,143 @@
+from datetime import timedelta, timezone
+from unittest.mock import MagicMock, call
+
+from sqlalchemy import select
+
+from app.db import YoutubeChannel, YoutubeVideo, YoutubeVideoCategory
+from app.services import google
+from app.tasks.youtube import (
+    CHANNEL_VIDEOS_KEY,
+    CHANNEL_VIDEOS_PENDING_TTL,
+    CHANNEL_VIDEOS_RUNNING_TTL,
+    add_channel_videos,
+    get_channel_videos_metrics,
+    request_channel_videos,
+)
+
+
+async def test_request_channel_videos_coalesces_pending_requests(
+    monkeypatch,
+    faker,
+    create_youtube_channel,
+    create_youtube_video_category,
+    provide_google_api_response,
+    db_session,
+):
+    """
+    Test requesting channel videos multiple times before the task runs. It should
+    only enqueue one task, which crawls back to the earliest requested date.
+    """
+
+    add_channel_videos_mock = MagicMock()
+    monkeypatch.setattr(add_channel_videos, "delay", add_channel_videos_mock)
+
+    channel: YoutubeChannel = await create_youtube_channel()
+    category: YoutubeVideoCategory = await create_youtube_video_category()
+    published_dates = [
+        published_at
+        for published_at, _ in faker.time_series(
+            start_date="-10d",
+            end_date="now",
+            precision=60 * 60 * 24,
+            tzinfo=timezone.utc,
+        )
+    ]
+    published_dates.reverse()
+    api_videos = [
+        {
+            "id": faker.uuid4(),
+            "title": faker.word(),
+            "thumbnail": faker.url(),
+            "description": faker.word(),
+            "category_id": category.id,
+            "published": published_at.isoformat(),
+        }
+        for published_at in published_dates
+    ]
+    monkeypatch.setattr(
+        google,
+        "get_channel_latest_videos",
+        provide_google_api_response(pages=[api_videos], model=google.YoutubeVideoInfo),
+    )
+
+    recent_date = published_dates[2].date()
+    earliest_date = published_dates[5].date()
+    assert await request_channel_videos(channel_id=channel.id, date_after=recent_date)
+    assert not await request_channel_videos(
+        channel_id=channel.id, date_after=earliest_date
+    )
+    assert not await request_channel_videos(
+        channel_id=channel.id, date_after=recent_date
+    )
+    add_channel_videos_mock.assert_called_once_with(
+        channel_id=channel.id, date_after=recent_date
+    )
+
+    await add_channel_videos(channel_id=channel.id, date_after=recent_date)
+
+    video_ids = set((await db_session.scalars(select(YoutubeVideo.id))).all())
+    assert video_ids == {video["id"] for video in api_videos[:6]}
+    assert await get_channel_videos_metrics() == {
+        "enqueued": 1,
+        "coalesced": 2,
+        "absorbed": 0,
+    }
+    assert await request_channel_videos(channel_id=channel.id)
+
+
+async def test_add_channel_videos_absorbs_requests_while_running(
+    monkeypatch,
+    faker,
+    create_youtube_channel,
+    create_youtube_video_category,
+):
+    """
+    Test requesting channel videos while the channel is being crawled. It should
+    not enqueue another task during the crawl, and it should enqueue a single
+    follow up task for requests that arrived after the last page was read. The
+    claim should only keep the running TTL while the crawl runs, and go back to
+    the longer queued TTL once the follow up task is enqueued.
+    """
+
+    add_channel_videos_mock = MagicMock()
+    monkeypatch.setattr(add_channel_videos, "delay", add_channel_videos_mock)
+
+    channel: YoutubeChannel = await create_youtube_channel()
+    category: YoutubeVideoCategory = await create_youtube_video_category()
+    date_after = faker.past_date()
+
+    key = CHANNEL_VIDEOS_KEY.format(channel_id=channel.id)
+
+    async def _get_channel_latest_videos(*args, **kwargs):
+        async with add_channel_videos.redis_client() as redis:
+            assert 0 < await redis.ttl(key) <= CHANNEL_VIDEOS_RUNNING_TTL
+        yield [
+            google.YoutubeVideoInfo(
+                id=faker.uuid4(),
+                title=faker.word(),
+                thumbnail=faker.url(),
+                description=faker.word(),
+                category_id=category.id,
+                published=faker.future_datetime(tzinfo=timezone.utc).isoformat(),
+            )
+        ]
+        for days in range(1, 3):
+            assert not await request_channel_videos(
+                channel_id=channel.id, date_after=date_after - timedelta(days=days)
+            )
+
+    monkeypatch.setattr(google, "get_channel_latest_videos", _get_channel_latest_videos)
+
+    await add_channel_videos(channel_id=channel.id, date_after=date_after)
+
+    assert add_channel_videos_mock.call_args_list == [
+        call(channel_id=channel.id, date_after=date_after - timedelta(days=2))
+    ]
+    assert await get_channel_videos_metrics() == {
+        "enqueued": 0,
+        "coalesced": 0,
+        "absorbed": 2,
+    }
+    async with add_channel_videos.redis_client() as redis:
+        assert await redis.ttl(key) > CHANNEL_VIDEOS_PENDING_TTL - 60
+    assert not await request_channel_videos(channel_id=channel.id)
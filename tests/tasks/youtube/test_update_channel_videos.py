@@ -124,3 +124,34 @@ async def test_update_channel_videos_with_min_last_updated(
     add_channel_videos_mock.assert_has_calls(
         [call(channel_id=channel.id, date_after=month_ago.date())]
     )
+
+
+async def test_update_channel_videos_with_full_backfill(
+    create_user, monkeypatch, create_youtube_channel, create_youtube_subscription, faker
+):
+    """
+    Test update channel videos task with a full backfill. Every channel
+    belonging to an active subscription should be crawled with a full backfill.
+    """
+
+    date_after = faker.date_time(tzinfo=timezone.utc)
+
+    add_channel_videos_mock = MagicMock()
+    monkeypatch.setattr(add_channel_videos, "delay", add_channel_videos_mock)
+
+    user: User = await create_user()
+    channels: list[YoutubeChannel] = [await create_youtube_channel() for _ in range(3)]
+    for channel in channels:
+        await create_youtube_subscription(channel_id=channel.id, email=user.email)
+    await update_channel_videos(date_after=date_after.date(), full_backfill=True)
+    add_channel_videos_mock.assert_has_calls(
+        [
+            call(
+                channel_id=channel.id,
+                date_after=date_after.date(),
+                full_backfill=True,
+            )
+            for channel in channels
+        ],
+        any_order=True,
+    )
@@ -1,6 +1,22 @@
-from unittest.mock import MagicMock, call
+from unittest.mock import AsyncMock, MagicMock, call
 
-from app.tasks.youtube import update_subscriptions, update_user_subscriptions
+from fastapi import BackgroundTasks
+from sqlalchemy import select
+
+from app.db import (
+    User,
+    YoutubeChannel,
+    YoutubeFeedVideo,
+    YoutubeSubscription,
+    YoutubeUserChannel,
+)
+from app.routes.youtube.subscriptions import add_user_subscription
+from app.services import google
+from app.tasks.youtube import (
+    add_channel_videos,
+    update_subscriptions,
+    update_user_subscriptions,
+)
 
 
 async def test_update_subscriptions(monkeypatch, create_user):
@@ -20,3 +36,157 @@ async def test_update_subscriptions(monkeypatch, create_user):
     update_user_subscriptions_mock.assert_has_calls(
         [call(email=user.email) for user in users], any_order=True
     )
+
+
+async def test_update_user_subscriptions(
+    monkeypatch,
+    faker,
+    db_session,
+    create_user,
+    create_youtube_channel,
+    create_youtube_subscription,
+    create_youtube_video,
+    provide_google_api_response,
+):
+    """
+    Test running update user subscriptions task. It should add new channels and
+    subscriptions, restore removed subscriptions, soft remove stale subscriptions
+    and leave user submitted subscriptions alone. The user's feed should follow
+    the active subscriptions.
+    """
+
+    add_channel_videos_mock = MagicMock()
+    monkeypatch.setattr(add_channel_videos, "delay", add_channel_videos_mock)
+
+    user: User = await create_user()
+    db_session.add(YoutubeUserChannel(id=faker.uuid4(), email=user.email))
+    await db_session.commit()
+
+    existing_channel: YoutubeChannel = await create_youtube_channel()
+    restored_subscription: YoutubeSubscription = await create_youtube_subscription(
+        email=user.email, channel_id=existing_channel.id, deleted=True
+    )
+    stale_subscription: YoutubeSubscription = await create_youtube_subscription(
+        email=user.email
+    )
+    user_subscription: YoutubeSubscription = await create_youtube_subscription(
+        email=user.email
+    )
+    user_subscription.user_submitted = True
+    await db_session.commit()
+    for subscription in [
+        restored_subscription,
+        stale_subscription,
+        user_subscription,
+    ]:
+        await create_youtube_video(channel_id=subscription.channel_id)
+
+    new_channels = [
+        {"id": faker.uuid4(), "title": faker.word(), "thumbnail": faker.image_url()}
+        for _ in range(3)
+    ]
+    updated_title = faker.word()
+    api_channels = [
+        *new_channels,
+        {
+            "id": existing_channel.id,
+            "title": updated_title,
+            "thumbnail": existing_channel.thumbnail,
+        },
+    ]
+    monkeypatch.setattr(
+        google,
+        "get_channel_subscriptions",
+        provide_google_api_response(
+            pages=[api_channels[:2], api_channels[2:]],
+            model=google.YoutubeChannelInfo,
+        ),
+    )
+
+    await update_user_subscriptions(email=user.email)
+
+    for instance in [
+        existing_channel,
+        restored_subscription,
+        stale_subscription,
+        user_subscription,
+    ]:
+        await db_session.refresh(instance)
+
+    query = select(YoutubeSubscription.channel_id).where(
+        YoutubeSubscription.email == user.email,
+        YoutubeSubscription.deleted_at.is_(None),
+    )
+    active_channel_ids = set((await db_session.scalars(query)).all())
+
+    assert active_channel_ids == {
+        *[channel["id"] for channel in api_channels],
+        user_subscription.channel_id,
+    }
+    assert existing_channel.title == updated_title
+    assert restored_subscription.deleted_at is None
+    assert stale_subscription.deleted_at is not None
+    assert user_subscription.deleted_at is None
+    query = select(YoutubeFeedVideo.channel_id).where(
+        YoutubeFeedVideo.email == user.email
+    )
+    assert set((await db_session.scalars(query)).all()) == {
+        existing_channel.id,
+        user_subscription.channel_id,
+    }
+    add_channel_videos_mock.assert_has_calls(
+        [call(channel_id=channel["id"], date_after=None) for channel in new_channels],
+        any_order=True,
+    )
+    assert add_channel_videos_mock.call_count == len(new_channels)
+
+
+async def test_update_user_subscriptions_keeps_readded_subscription(
+    monkeypatch,
+    faker,
+    db_session,
+    create_user,
+    create_youtube_subscription,
+    provide_google_api_response,
+):
+    """
+    Test running update user subscriptions after the user re-added a channel
+    that a previous sync removed. The re-added subscription should stay active.
+    """
+
+    user: User = await create_user()
+    db_session.add(YoutubeUserChannel(id=faker.uuid4(), email=user.email))
+    await db_session.commit()
+    subscription: YoutubeSubscription = await create_youtube_subscription(
+        email=user.email
+    )
+    monkeypatch.setattr(
+        google,
+        "get_channel_subscriptions",
+        provide_google_api_response(pages=[[]], model=google.YoutubeChannelInfo),
+    )
+    monkeypatch.setattr(
+        google,
+        "get_channel_info",
+        AsyncMock(
+            return_value=google.YoutubeChannelInfo(
+                id=subscription.channel_id,
+                title=faker.word(),
+                thumbnail=faker.image_url(),
+            )
+        ),
+    )
+    monkeypatch.setattr(add_channel_videos, "delay", MagicMock())
+
+    await update_user_subscriptions(email=user.email)
+    await db_session.refresh(subscription)
+    assert subscription.deleted_at is not None
+
+    await add_user_subscription(
+        user, db_session, BackgroundTasks(), subscription.channel_id
+    )
+    await update_user_subscriptions(email=user.email)
+
+    await db_session.refresh(subscription)
+    assert subscription.deleted_at is None
+    assert subscription.user_submitted is True